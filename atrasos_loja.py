@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+# --- ATRASOS FRENTE AO PRAZO ESTIMADO ---
+# atraso_dias (dados_loja) = dia da entrega - dia estimado; > 0 é atraso. Cada pedido entra uma
+# vez (uma vez por loja, na quebra por loja). Todos os grupos saem de uma passada vetorizada: os
+# pedidos são ordenados por (grupo, atraso) e os percentis de cada grupo são lidos por posição.
+# As páginas guardam o resultado por (loja/recorte, período, quebra) no st.cache_data.
+
+PERCENTIS = (0.5, 0.9, 0.99)
+
+DIMENSOES_ATRASO = {"customer_state": "Estado", "customer_city": "Cidade", "seller_id": "Loja", "ano_mes": "Mês"}
+
+# no ranking dos piores grupos, grupos com poucas entregas (1 pedido atrasado = 0% no prazo) ficam de fora
+PEDIDOS_MINIMOS_RANKING = 10
+
+COLUNAS_ATRASO = ["pedidos", "atrasados", "taxa_no_prazo", *(f"atraso_p{round(q * 100)}" for q in PERCENTIS)]
+
+
+def atrasos_por_pedido(df, dimensao=None):
+    # só pedidos entregues e com prazo estimado; por loja, um pedido dividido conta para cada loja
+    chaves = ["pedido", "seller_id"] if dimensao == "seller_id" else ["pedido"]
+    entregues = df[df["atraso_dias"].notna()]
+    return entregues.loc[~entregues.duplicated(chaves).to_numpy()]
+
+
+def _percentis_por_grupo(codigos, valores, grupos):
+    # mesma interpolação linear de np.percentile, para todos os grupos de uma vez
+    ordem = np.lexsort((valores, codigos))
+    ordenados = valores[ordem]
+    contagens = np.bincount(codigos, minlength=grupos)
+    inicios = np.cumsum(contagens) - contagens
+    resultado = {}
+    for q in PERCENTIS:
+        posicao = inicios + q * np.maximum(contagens - 1, 0)
+        baixo = np.floor(posicao).astype(np.int64)
+        alto = np.minimum(baixo + 1, inicios + np.maximum(contagens - 1, 0))
+        if len(ordenados):
+            fracao = posicao - baixo
+            valor = ordenados[np.minimum(baixo, len(ordenados) - 1)] * (1 - fracao) + ordenados[np.minimum(alto, len(ordenados) - 1)] * fracao
+        else:
+            valor = np.zeros(grupos)
+        resultado[f"atraso_p{round(q * 100)}"] = np.where(contagens > 0, valor, np.nan)
+    return resultado
+
+
+def resumo_atrasos(df, dimensao=None):
+    # uma linha por grupo de `dimensao` (ou uma linha "Total"), com as colunas de COLUNAS_ATRASO
+    pedidos = atrasos_por_pedido(df, dimensao)
+    if dimensao is None:
+        codigos, grupos = np.zeros(len(pedidos), dtype=np.int64), pd.Index(["Total"])
+    else:
+        codigos, grupos = pd.factorize(pedidos[dimensao], sort=True)
+        validos = codigos >= 0
+        pedidos, codigos = pedidos[validos], codigos[validos]
+    atraso = pedidos["atraso_dias"].to_numpy(dtype=np.float64)
+    entregues = np.bincount(codigos, minlength=len(grupos))
+    atrasados = np.bincount(codigos, weights=atraso > 0, minlength=len(grupos)).astype(np.int64)
+    tabela = pd.DataFrame({
+        "pedidos": entregues,
+        "atrasados": atrasados,
+        "taxa_no_prazo": np.divide(entregues - atrasados, entregues, out=np.full(len(grupos), np.nan), where=entregues > 0),
+        **_percentis_por_grupo(codigos, atraso, len(grupos)),
+    }, index=pd.Index(np.asarray(grupos), name=dimensao))
+    return tabela[COLUNAS_ATRASO]
+
+
+def figura_atrasos(tabela, dimensao, limite=10):
+    # mês: evolução da taxa no prazo; demais quebras: os `limite` grupos com menor taxa no prazo
+    rotulos = {dimensao: DIMENSOES_ATRASO.get(dimensao, dimensao), "taxa_no_prazo": "No prazo", "atraso_p90": "Atraso p90 (dias)"}
+    dados = tabela.reset_index()
+    if dimensao == "ano_mes":
+        fig = px.line(dados, x=dimensao, y="taxa_no_prazo", markers=True, hover_data=["pedidos", "atrasados", "atraso_p90"], labels=rotulos, title="Entregas no Prazo por Mês")
+        fig.update_yaxes(tickformat=".0%")
+        return fig
+    relevantes = dados[dados["pedidos"] >= PEDIDOS_MINIMOS_RANKING]
+    piores = (relevantes if not relevantes.empty else dados).nsmallest(limite, "taxa_no_prazo")
+    fig = px.bar(piores, x="taxa_no_prazo", y=dimensao, orientation="h", hover_data=["pedidos", "atrasados", "atraso_p90"], labels=rotulos, title=f"Menor Taxa de Entrega no Prazo por {rotulos[dimensao]}")
+    fig.update_layout(yaxis={"categoryorder": "total descending", "type": "category"})
+    fig.update_xaxes(tickformat=".0%")
+    return fig
@@ -0,0 +1,204 @@
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from dados_sinteticos import gerar_csv
+from memoria_loja import pico_rss_desde_zerar_mb, rss_atual_mb, zerar_pico_rss
+
+# --- BENCHMARK DO PAINEL ---
+# Gera bases sintéticas de vários tamanhos e mede, sem navegador, as etapas que pesam no painel:
+# carga do CSV, filtro de período, KPIs, respostas do bot e as três páginas rodando no AppTest do
+# Streamlit (que monta todas as figuras). Cada tamanho roda num processo próprio, com caches frios.
+# Memória de cada etapa: o pico de RSS durante ela (o pico do processo é zerado antes, no Linux) e
+# quanto o RSS ficou maior ou menor depois dela (o que a etapa deixou carregado).
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+TAMANHOS_PADRAO = [100_000, 1_000_000]
+
+PERGUNTAS = [
+    "Me dê um resumo do período", "Qual meu produto mais vendido?", "Meus clientes estão satisfeitos?",
+    "Qual o ticket médio?", "Qual dia da semana vende mais?", "Qual estado tem a entrega mais demorada?",
+    "Qual o faturamento em SP?", "Quantos pedidos no cartão de crédito?", "frete na cidade de sp_cidade_0",
+]
+
+SECOES_DASHBOARD = ["Visão Geral", "Meus Produtos", "Análise de Logística", "Comparativo"]
+
+
+class Medidor:
+    def __init__(self, repeticoes):
+        self.repeticoes = repeticoes
+        self.resultados = []
+
+    def medir(self, etapa, funcao, repetir=True, preparar=None):
+        # tempo = melhor de `repeticoes` execuções; etapas frias (repetir=False) rodam uma vez só.
+        # Memória: maior pico entre as execuções e variação do RSS na primeira (a que fica com o que carregou).
+        tempos, picos, variacoes = [], [], []
+        for _ in range(self.repeticoes if repetir else 1):
+            if preparar is not None:
+                preparar()
+            antes = rss_atual_mb()
+            zerar_pico_rss()
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+            picos.append(pico_rss_desde_zerar_mb())
+            variacoes.append(rss_atual_mb() - antes)
+        self.resultados.append({"etapa": etapa, "segundos": min(tempos), "pico_rss_mb": max(picos), "variacao_rss_mb": variacoes[0]})
+        print(f"  {etapa:<46} {min(tempos):9.3f} s {max(picos):9.0f} MB {variacoes[0]:+9.0f} MB", file=sys.stderr)
+
+
+def _periodos(base):
+    fim = base["order_purchase_timestamp"].max().date()
+    return {
+        "mes": (fim.replace(day=1), fim),
+        "trimestre": ((pd.Timestamp(fim) - pd.DateOffset(months=3)).date(), fim),
+        "ano": ((pd.Timestamp(fim) - pd.DateOffset(years=1)).date(), fim),
+    }
+
+
+def rodar_pagina(arquivo, sessao=None, depois=None):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(RAIZ, arquivo), default_timeout=3600)
+    for chave, valor in (sessao or {}).items():
+        app.session_state[chave] = valor
+    app.run()
+    if depois is not None:
+        depois(app)
+    if app.exception:
+        raise RuntimeError(f"{arquivo}: {app.exception[0].value}")
+    return app
+
+
+def medir_etapas(repeticoes):
+    # roda no diretório da base sintética (os módulos leem dataset_olist_final_limpo.csv do cwd)
+    import streamlit as st
+    import bot_loja
+    import dados_loja
+    from comparacao_loja import comparar
+    from cubo_loja import carregar_cubo, consultar_periodo, construir_cubo, faturamento_mensal, kpis, somar_por
+    from lote_bot import avaliar_lote
+
+    logging.disable(logging.WARNING)  # sem os avisos do Streamlit (modo "bare", depreciação) no meio da tabela
+    medidor = Medidor(repeticoes)
+    medidor.medir("carga_csv (CSV -> Parquet)", dados_loja.converter_csv, repetir=False)
+    medidor.medir("carga_parquet", dados_loja.carregar_base, preparar=dados_loja._cache.clear)
+    base = dados_loja.carregar_base()
+    periodos = _periodos(base)
+
+    for nome, (inicio, fim) in periodos.items():
+        medidor.medir(f"filtro_periodo ({nome})", lambda: dados_loja.filtrar_periodo(base, inicio, fim))
+    medidor.medir("cubo", lambda: construir_cubo(base))
+    cubo = carregar_cubo()
+
+    def kpis_do_ano():
+        cubo_periodo = consultar_periodo(cubo, *periodos["ano"])
+        kpis(cubo_periodo), faturamento_mensal(cubo_periodo), somar_por(cubo_periodo, "customer_state", "itens")
+
+    medidor.medir("kpis (ano)", kpis_do_ano)
+    medidor.medir("comparacao (trimestre)", lambda: comparar(cubo, *periodos["trimestre"]))
+
+    def limpar_bot():
+        bot_loja._responder_em_cache.cache_clear()
+        bot_loja._padroes_dos_dados.cache_clear()
+        bot_loja._cubo_das_lojas.cache_clear()
+
+    def responder_perguntas():
+        for pergunta in PERGUNTAS:
+            bot_loja.responder(bot_loja.interpretar(pergunta, *periodos["ano"])[0])
+
+    medidor.medir(f"bot ({len(PERGUNTAS)} perguntas)", responder_perguntas, preparar=limpar_bot)
+    meses = [(p.start_time.date(), p.end_time.date()) for p in pd.period_range(*periodos["ano"], freq="M")]
+    lote = [(pergunta, periodo, "") for pergunta in PERGUNTAS for periodo in meses]
+    medidor.medir(f"bot_lote ({len(lote)} perguntas)", lambda: avaliar_lote(lote), preparar=limpar_bot)
+
+    # páginas com o cache do Streamlit limpo; a base compartilhada já está carregada, como num servidor em uso
+    maior_loja = base["seller_id"].value_counts().index[0]
+    limpar_paginas = lambda: (st.cache_data.clear(), st.cache_resource.clear(), limpar_bot())
+    medidor.medir(
+        "pagina loja_bot (resumo)",
+        lambda: rodar_pagina("loja_bot.py", {"pergunta_atual": PERGUNTAS[0]}),
+        preparar=limpar_paginas,
+    )
+    medidor.medir(
+        f"pagina dashboard_loja ({SECOES_DASHBOARD[0]})",
+        lambda: rodar_pagina("pages/dashboard_loja.py", {"seller_id": maior_loja}),
+        preparar=limpar_paginas,
+    )
+    # as outras seções são medidas na troca de aba: a página já aberta na loja, só a seção nova é montada
+    aberta = {}
+
+    def abrir_dashboard():
+        limpar_paginas()
+        aberta["app"] = rodar_pagina("pages/dashboard_loja.py", {"seller_id": maior_loja})
+
+    for secao in SECOES_DASHBOARD[1:]:
+        medidor.medir(
+            f"pagina dashboard_loja ({secao})",
+            lambda: aberta["app"].radio[0].set_value(secao).run(),
+            preparar=abrir_dashboard,
+        )
+    medidor.medir("pagina logistica_regional_loja", lambda: rodar_pagina("pages/logistica_regional_loja.py"), preparar=limpar_paginas)
+    return medidor.resultados
+
+
+def preparar_base(pasta, linhas, semente, regerar=False):
+    destino = os.path.join(pasta, f"linhas_{linhas}")
+    caminho = os.path.join(destino, "dataset_olist_final_limpo.csv")
+    if regerar or not os.path.exists(caminho):
+        os.makedirs(destino, exist_ok=True)
+        inicio = time.perf_counter()
+        escritas = gerar_csv(caminho, linhas, semente=semente)
+        print(f"{caminho}: {escritas:,} linhas geradas em {time.perf_counter() - inicio:.1f} s", file=sys.stderr)
+    return destino
+
+
+def medir_tamanho(destino, repeticoes):
+    # processo novo por tamanho: caches frios e pico de memória só daquele tamanho
+    comando = [sys.executable, os.path.abspath(__file__), "--medir-aqui", "--repeticoes", str(repeticoes)]
+    saida = subprocess.run(comando, cwd=destino, stdout=subprocess.PIPE, text=True, check=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def comparar_com(resultado, caminho_anterior):
+    anterior = pd.read_csv(caminho_anterior).set_index(["linhas", "etapa"])["segundos"]
+    resultado["segundos_antes"] = [anterior.get((l, e)) for l, e in zip(resultado["linhas"], resultado["etapa"])]
+    resultado["variacao_pct"] = (resultado["segundos"] / resultado["segundos_antes"] - 1) * 100
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede carga, filtros, KPIs, bot e páginas em bases sintéticas de vários tamanhos.")
+    parser.add_argument("linhas", type=int, nargs="*", default=TAMANHOS_PADRAO, help="tamanhos da base (padrão: 100000 1000000; vai até 50000000)")
+    parser.add_argument("--pasta", default="benchmark_dados", help="onde as bases sintéticas são geradas e reaproveitadas")
+    parser.add_argument("--repeticoes", type=int, default=3, help="cada etapa repetível vale o melhor tempo de N execuções")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--regerar", action="store_true", help="gera de novo as bases que já existem na pasta")
+    parser.add_argument("-o", "--saida", default="benchmark_resultados.csv", help="arquivo de saída .csv ou .json")
+    parser.add_argument("--comparar", help="resultado .csv de uma execução anterior, para ver a variação de cada etapa")
+    parser.add_argument("--medir-aqui", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir_aqui:
+        print(json.dumps(medir_etapas(args.repeticoes)))
+        sys.exit()
+
+    from lote_bot import salvar
+
+    linhas_resultado = []
+    for linhas in args.linhas:
+        destino = preparar_base(args.pasta, linhas, args.semente, args.regerar)
+        print(f"{linhas:,} linhas:", file=sys.stderr)
+        linhas_resultado.extend({"linhas": linhas, **r} for r in medir_tamanho(destino, args.repeticoes))
+
+    resultado = pd.DataFrame(linhas_resultado)
+    if args.comparar:
+        resultado = comparar_com(resultado, args.comparar)
+    salvar(resultado, args.saida)
+    print(resultado.to_string(index=False, float_format="{:,.3f}".format))
@@ -0,0 +1,386 @@
+import re
+import unicodedata
+from collections import namedtuple
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+from comparacao_loja import comparar, get_periodo_anterior, inicio_das_janelas
+from cubo_loja import carregar_cubo, consultar_periodo, construir_cubo, kpis, somar_por, media_por, faturamento_dia_semana
+from dados_loja import carregar_base, carregar_linhas_lojas, carregar_vendedor_preparado, filtrar_periodo, ordenar_por_compra, versao_dados
+from regioes_loja import REGIOES, regiao_dos_estados
+
+# --- ROTEADOR DE INTENÇÕES DO BOT ---
+# A pergunta vira uma Consulta (intenção, período, filtros). Os padrões são compilados uma vez
+# e as respostas ficam num cache LRU por (consulta, versão dos dados), então repetir uma
+# pergunta (ex.: os botões de Perguntas Rápidas) não toca nos dados.
+
+TAMANHO_CACHE_RESPOSTAS = 512
+TAMANHO_CACHE_LOJAS = 16
+
+MESES = {'janeiro': 1, 'fevereiro': 2, 'marco': 3, 'abril': 4, 'maio': 5, 'junho': 6, 'julho': 7, 'agosto': 8, 'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12}
+
+ESTADOS = {
+    "AC": "acre", "AL": "alagoas", "AP": "amapa", "AM": "amazonas", "BA": "bahia", "CE": "ceara",
+    "DF": "distrito federal", "ES": "espirito santo", "GO": "goias", "MA": "maranhao", "MT": "mato grosso",
+    "MS": "mato grosso do sul", "MG": "minas gerais", "PA": "para", "PB": "paraiba", "PR": "parana",
+    "PE": "pernambuco", "PI": "piaui", "RJ": "rio de janeiro", "RN": "rio grande do norte",
+    "RS": "rio grande do sul", "RO": "rondonia", "RR": "roraima", "SC": "santa catarina",
+    "SP": "sao paulo", "SE": "sergipe", "TO": "tocantins",
+}
+# "para" também é preposição; só vale como estado quando vier como "estado do para"
+ESTADOS_AMBIGUOS = {"para"}
+
+PAGAMENTOS = {
+    "credit_card": r"cartao de credito|\bcredito\b",
+    "debit_card": r"cartao de debito|\bdebito\b",
+    "boleto": r"\bboleto",
+    "voucher": r"\bvoucher",
+}
+
+# em ordem de prioridade: a primeira que casar define a intenção
+INTENCOES = [
+    ("resumo", r"\bresumo\b"),
+    ("produto_mais_vendido", r"produto mais vendido|categoria mais vendida"),
+    ("ticket_medio", r"ticket medio"),
+    ("melhor_dia_semana", r"dia da semana.*vende mais|vende mais.*dia da semana"),
+    ("entrega_mais_demorada", r"entrega mais demorada"),
+    ("tempo_entrega", r"tempo (?:medio )?de entrega|prazo de entrega"),
+    ("atrasos", r"\batras|\bno prazo\b|fora do prazo"),
+    ("frete", r"\bfrete\b"),
+    ("satisfacao", r"satisfeitos|nota media|satisfacao"),
+    ("pedidos", r"\bpedidos\b"),
+    ("faturamento", r"faturamento|\breceita\b"),
+]
+
+TEXTO_AJUDA = """
+    **Tente perguntar sobre:**
+    * `Resumo` do período
+    * `Faturamento`, `Pedidos` ou `Ticket Médio`
+    * `Produto mais vendido`
+    * `Dia da semana` com mais vendas
+    * `Satisfação dos clientes` (nota média)
+    * `Entregas` (tempo médio ou estado com maior demora) e `Frete`
+    * `Atrasos` (quantos pedidos atrasaram frente ao prazo estimado)
+
+    *Você também pode especificar um **mês e ano** na pergunta (ex: faturamento em maio de 2018)*
+    *e filtrar por **estado** (SP, Bahia), **região** (nordeste), **cidade** (cidade de salvador), **categoria** (health_beauty)*
+    *ou **pagamento** (boleto, cartão de crédito).*
+    """
+
+DIAS_SEMANA = {"Monday": "Segunda-feira", "Tuesday": "Terça-feira", "Wednesday": "Quarta-feira", "Thursday": "Quinta-feira", "Friday": "Sexta-feira", "Saturday": "Sábado", "Sunday": "Domingo"}
+
+Consulta = namedtuple("Consulta", ["intencao", "inicio", "fim", "estados", "regioes", "cidades", "categorias", "pagamentos", "vendedores"], defaults=[()])
+
+_PADRAO_MES_NOME = re.compile(r'\b(' + '|'.join(MESES) + r')\s*(?:de|/)\s*(\d{4})\b')
+_PADRAO_MES_NUMERO = re.compile(r'\b(0?[1-9]|1[0-2])/(\d{4})\b')
+_PADRAO_ANO = re.compile(r'\b(20\d{2})\b')
+_PADRAO_SIGLA = re.compile(r'\b(' + '|'.join(ESTADOS) + r')\b')
+_PADRAO_NOME_ESTADO = re.compile(
+    r'(estado d[eoa] )?\b(' + '|'.join(sorted(map(re.escape, ESTADOS.values()), key=len, reverse=True)) + r')\b'
+)
+_SIGLA_POR_NOME = {nome: sigla for sigla, nome in ESTADOS.items()}
+_REGIAO_POR_NOME = {regiao.lower().replace("-", " "): regiao for regiao in REGIOES}
+_PADRAO_REGIAO = re.compile(r'\b(' + '|'.join(nome.replace(" ", "[- ]") for nome in _REGIAO_POR_NOME) + r')\b')
+_PADROES_PAGAMENTO = [(tipo, re.compile(padrao)) for tipo, padrao in PAGAMENTOS.items()]
+_PADROES_INTENCAO = [(nome, re.compile(padrao)) for nome, padrao in INTENCOES]
+
+
+# --- FUNÇÕES DE APOIO ---
+def normalizar(texto):
+    sem_acento = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in sem_acento if not unicodedata.combining(c))
+
+
+def calcular_metricas(cubo_periodo):
+    if cubo_periodo.empty:
+        return {'faturamento': 0, 'pedidos': 0}
+    return kpis(cubo_periodo)
+
+
+def extrair_periodo_da_pergunta(pergunta):
+    texto = normalizar(pergunta)
+    match = _PADRAO_MES_NOME.search(texto)
+    if match:
+        mes_num, ano = MESES[match.group(1)], int(match.group(2))
+    else:
+        match = _PADRAO_MES_NUMERO.search(texto)
+        if match:
+            mes_num, ano = int(match.group(1)), int(match.group(2))
+        else:
+            match = _PADRAO_ANO.search(texto)
+            if match:
+                ano = int(match.group(1))
+                return date(ano, 1, 1), date(ano, 12, 31)
+            return None, None
+    start_date = date(ano, mes_num, 1)
+    end_date = start_date + relativedelta(months=1) - timedelta(days=1)
+    return start_date, end_date
+
+
+@lru_cache(maxsize=4)
+def _padroes_dos_dados(versao):
+    # cidades e categorias vêm dos dados, então o padrão é refeito só quando a versão muda
+    base = carregar_base()
+    cidades = sorted(base["customer_city"].dropna().unique(), key=len, reverse=True)
+    categorias = sorted(base["product_category_name_english"].dropna().unique(), key=len, reverse=True)
+    padrao_cidade = re.compile(r'\bcidade d?[eoa]?\s*(' + '|'.join(re.escape(normalizar(c)) for c in cidades) + r')\b')
+    padrao_categoria = re.compile(r'\b(' + '|'.join(re.escape(c).replace('_', '[ _]') for c in categorias) + r')\b')
+    cidade_por_nome = {normalizar(c): c for c in cidades}
+    return padrao_cidade, cidade_por_nome, padrao_categoria
+
+
+def extrair_filtros(pergunta, versao):
+    padrao_cidade, cidade_por_nome, padrao_categoria = _padroes_dos_dados(versao)
+    texto = normalizar(pergunta)
+
+    cidades = {cidade_por_nome[m.group(1)] for m in padrao_cidade.finditer(texto)}
+    # o nome da cidade sai do texto para "rio de janeiro" não virar também o estado
+    texto_sem_cidade = padrao_cidade.sub(" ", texto)
+
+    estados = set(_PADRAO_SIGLA.findall(pergunta))
+    for m in _PADRAO_NOME_ESTADO.finditer(texto_sem_cidade):
+        prefixo, nome = m.groups()
+        if nome not in ESTADOS_AMBIGUOS or prefixo:
+            estados.add(_SIGLA_POR_NOME[nome])
+
+    # sem os nomes de estado, "rio grande do norte" e "mato grosso do sul" não viram regiões
+    texto_sem_estado = _PADRAO_NOME_ESTADO.sub(" ", texto_sem_cidade)
+    regioes = {_REGIAO_POR_NOME[m.group(1).replace("-", " ")] for m in _PADRAO_REGIAO.finditer(texto_sem_estado)}
+
+    categorias = {m.group(1).replace(' ', '_') for m in padrao_categoria.finditer(texto_sem_cidade)}
+    pagamentos = {tipo for tipo, padrao in _PADROES_PAGAMENTO if padrao.search(texto)}
+    return tuple(sorted(estados)), tuple(r for r in REGIOES if r in regioes), tuple(sorted(cidades)), tuple(sorted(categorias)), tuple(sorted(pagamentos))
+
+
+def interpretar(pergunta, inicio_contexto, fim_contexto):
+    # devolve a Consulta e se o período veio da própria pergunta
+    texto = normalizar(pergunta)
+    intencao = next((nome for nome, padrao in _PADROES_INTENCAO if padrao.search(texto)), None)
+    inicio, fim = extrair_periodo_da_pergunta(pergunta)
+    periodo_da_pergunta = inicio is not None
+    if not periodo_da_pergunta:
+        inicio, fim = inicio_contexto, fim_contexto
+    if intencao is None:
+        return Consulta(None, inicio, fim, (), (), (), (), ()), periodo_da_pergunta
+    return Consulta(intencao, inicio, fim, *extrair_filtros(pergunta, versao_dados())), periodo_da_pergunta
+
+
+def mascara_linhas(linhas, cidades=(), categorias=(), pagamentos=()):
+    mascara = np.ones(len(linhas), dtype=bool)
+    for coluna, valores in (("customer_city", cidades), ("product_category_name_english", categorias), ("payment_type", pagamentos)):
+        if valores:
+            mascara &= linhas[coluna].isin(valores).to_numpy()
+    return mascara
+
+
+def linhas_das_lojas(vendedores):
+    if len(vendedores) == 1:
+        return carregar_vendedor_preparado(vendedores[0])
+    linhas = carregar_linhas_lojas()
+    return ordenar_por_compra(linhas[linhas["seller_id"].isin(vendedores).to_numpy()])
+
+
+@lru_cache(maxsize=TAMANHO_CACHE_LOJAS)
+def _cubo_das_lojas(vendedores, cidades, categorias, pagamentos, versao):
+    # a loja vista como no portal do vendedor: as linhas dela no horário da loja, só pedidos
+    # entregues, e cada pedido contado uma vez por loja. O peso de um pedido não depende do
+    # período (as linhas dele caem no mesmo dia), então o cubo da loja serve a qualquer período.
+    linhas = linhas_das_lojas(vendedores)
+    return construir_cubo(linhas[mascara_linhas(linhas, cidades, categorias, pagamentos)], por_loja=True)
+
+
+def cubo_da_consulta(consulta):
+    if consulta.vendedores:
+        cubo = _cubo_das_lojas(consulta.vendedores, consulta.cidades, consulta.categorias, consulta.pagamentos, versao_dados())
+        cubo = consultar_periodo(cubo, consulta.inicio, consulta.fim)
+    elif consulta.cidades or consulta.categorias or consulta.pagamentos:
+        # Cidade não é dimensão do cubo, e categoria e pagamento dividem pedidos entre células (itens
+        # de duas categorias, dois pagamentos): recortar o cubo contaria esses pedidos pela fração das
+        # linhas. Monta um cubo só com as linhas pedidas, em que cada pedido do recorte conta uma vez.
+        linhas = filtrar_periodo(carregar_base(), consulta.inicio, consulta.fim)
+        cubo = construir_cubo(linhas[mascara_linhas(linhas, consulta.cidades, consulta.categorias, consulta.pagamentos)])
+    else:
+        cubo = consultar_periodo(carregar_cubo(), consulta.inicio, consulta.fim)
+    if consulta.estados:
+        cubo = cubo[cubo["customer_state"].isin(consulta.estados)]
+    if consulta.regioes:
+        cubo = cubo[regiao_dos_estados(cubo["customer_state"]).isin(consulta.regioes).to_numpy()]
+    return cubo
+
+
+def descrever_filtros(consulta):
+    partes = []
+    if consulta.estados:
+        partes.append("estado " + ", ".join(consulta.estados))
+    if consulta.regioes:
+        partes.append("região " + ", ".join(consulta.regioes))
+    if consulta.cidades:
+        partes.append("cidade " + ", ".join(consulta.cidades))
+    if consulta.categorias:
+        partes.append("categoria " + ", ".join(c.replace("_", " ").title() for c in consulta.categorias))
+    if consulta.pagamentos:
+        partes.append("pagamento " + ", ".join(consulta.pagamentos))
+    if consulta.vendedores:
+        partes.append("loja " + ", ".join(consulta.vendedores))
+    return " · ".join(partes)
+
+
+# --- VALORES POR INTENÇÃO ---
+# calcular_valores só calcula o que a intenção usa; o lote (lote_bot.py) calcula os mesmos
+# valores de forma vetorizada e reaproveita formatar_resposta, então os textos são idênticos.
+def mais_vendido(cubo):
+    itens_categoria = somar_por(cubo, 'product_category_name_english', 'itens')
+    return itens_categoria.idxmax() if not itens_categoria.empty else None
+
+
+def entrega_mais_demorada(cubo):
+    ponto_atencao = media_por(cubo, 'customer_state', 'soma_tempo_entrega', 'qtd_tempo_entrega').nlargest(1)
+    if ponto_atencao.empty:
+        return None, None
+    return ponto_atencao.index[0], ponto_atencao.values[0]
+
+
+def melhor_dia_semana(cubo):
+    faturamento_dia = faturamento_dia_semana(cubo).dropna()
+    return faturamento_dia.idxmax() if not faturamento_dia.empty else None
+
+
+def calcular_valores(consulta, cubo):
+    valores = kpis(cubo)
+    valores['vazio'] = cubo.empty
+    if consulta.intencao in ("resumo", "produto_mais_vendido"):
+        valores['produto_campeao'] = mais_vendido(cubo)
+    if consulta.intencao in ("resumo", "entrega_mais_demorada"):
+        valores['estado_atencao'], valores['tempo_atencao'] = entrega_mais_demorada(cubo)
+    if consulta.intencao == "melhor_dia_semana":
+        valores['melhor_dia'] = melhor_dia_semana(cubo)
+    if consulta.intencao == "resumo":
+        cubo_janelas = cubo_da_consulta(consulta._replace(inicio=inicio_das_janelas(consulta.inicio, consulta.fim)))
+        total = comparar(cubo_janelas, consulta.inicio, consulta.fim, dimensoes=())[None].iloc[0].fillna(0)
+        for janela in ("anterior", "ano_anterior"):
+            valores[f'faturamento_{janela}'] = total[('faturamento', janela)]
+            valores[f'pedidos_{janela}'] = int(total[('pedidos', janela)])
+    return valores
+
+
+# --- TEXTOS DAS RESPOSTAS ---
+def _variacao(atual, anterior):
+    return ((atual - anterior) / anterior * 100) if anterior > 0 else 0
+
+
+def formatar_resumo(consulta, valores):
+    if valores['vazio']:
+        return "Não há dados no período para gerar um resumo."
+    variacao_fat = _variacao(valores['faturamento'], valores['faturamento_anterior'])
+    variacao_ped = _variacao(valores['pedidos'], valores['pedidos_anterior'])
+    variacao_fat_ano = _variacao(valores['faturamento'], valores['faturamento_ano_anterior'])
+    variacao_ped_ano = _variacao(valores['pedidos'], valores['pedidos_ano_anterior'])
+    produto_campeao = valores['produto_campeao'] or "N/A"
+
+    if valores['estado_atencao'] is not None:
+        texto_atencao = f"* **Ponto de Atenção:** O maior tempo de entrega foi para o estado de **{valores['estado_atencao']}**, com média de **{valores['tempo_atencao']:.1f} dias**."
+    else:
+        texto_atencao = ""
+
+    return f"""
+            **🤖 Resumo do Período ({consulta.inicio.strftime('%d/%m/%y')} a {consulta.fim.strftime('%d/%m/%y')})**
+
+            * **Faturamento:** R$ {valores['faturamento']:,.2f} ({variacao_fat:+.1f}% vs. período anterior, {variacao_fat_ano:+.1f}% vs. ano anterior)
+            * **Pedidos:** {valores['pedidos']} ({variacao_ped:+.1f}% vs. período anterior, {variacao_ped_ano:+.1f}% vs. ano anterior)
+            * **Produto Campeão:** Categoria "{produto_campeao.replace("_", " ").title()}"
+            {texto_atencao}
+            """
+
+
+def formatar_produto_mais_vendido(consulta, valores):
+    if valores['produto_campeao'] is None:
+        return "Não há vendas de produtos no período para analisar."
+    return f"🏆 Seu produto mais vendido no período foi **{valores['produto_campeao'].replace('_', ' ').title()}**."
+
+
+def formatar_ticket_medio(consulta, valores):
+    return f"O ticket médio por pedido no período foi de **R$ {valores['ticket_medio']:,.2f}**."
+
+
+def formatar_melhor_dia_semana(consulta, valores):
+    if valores['melhor_dia'] is None:
+        return "Não há dados suficientes para determinar o melhor dia da semana."
+    return f"O dia da semana com maior faturamento foi **{DIAS_SEMANA.get(valores['melhor_dia'], valores['melhor_dia'])}**."
+
+
+def formatar_entrega_mais_demorada(consulta, valores):
+    if valores['estado_atencao'] is None:
+        return "Não há dados de entrega para analisar."
+    return f"O estado com a maior média de tempo de entrega é **{valores['estado_atencao']}**, com **{valores['tempo_atencao']:.1f} dias**."
+
+
+def formatar_tempo_entrega(consulta, valores):
+    tempo = valores['tempo_medio_entrega']
+    if tempo != tempo:  # NaN: nenhum pedido entregue no período
+        return "Não há dados de entrega para analisar."
+    return f"🚚 O tempo médio de entrega no período foi de **{tempo:.1f} dias**."
+
+
+def formatar_atrasos(consulta, valores):
+    taxa = valores['taxa_no_prazo']
+    if taxa != taxa:  # NaN: nenhum pedido entregue com prazo estimado
+        return "Não há entregas com prazo estimado para analisar."
+    return f"⏰ **{valores['atrasados']:,}** pedidos chegaram depois do prazo estimado no período; **{taxa:.1%}** das entregas foram no prazo."
+
+
+def formatar_frete(consulta, valores):
+    return f"📦 O frete médio no período foi de **R$ {valores['frete_medio']:,.2f}**."
+
+
+def formatar_satisfacao(consulta, valores):
+    nota_media = valores['nota_media']
+    comentario = "É uma ótima nota!" if nota_media > 4 else "É uma boa nota, mas há espaço para melhorar." if nota_media > 3 else "Ponto de atenção! A satisfação pode ser melhorada."
+    return f"⭐ A nota média de satisfação dos seus clientes é **{nota_media:.2f} de 5**. {comentario}"
+
+
+def formatar_pedidos(consulta, valores):
+    return f"🛒 Foram feitos **{valores['pedidos']:,}** pedidos no período."
+
+
+def formatar_faturamento(consulta, valores):
+    return f"💰 O faturamento total no período foi de **R$ {valores['faturamento']:,.2f}**."
+
+
+FORMATOS = {
+    "resumo": formatar_resumo,
+    "produto_mais_vendido": formatar_produto_mais_vendido,
+    "ticket_medio": formatar_ticket_medio,
+    "melhor_dia_semana": formatar_melhor_dia_semana,
+    "entrega_mais_demorada": formatar_entrega_mais_demorada,
+    "tempo_entrega": formatar_tempo_entrega,
+    "atrasos": formatar_atrasos,
+    "frete": formatar_frete,
+    "satisfacao": formatar_satisfacao,
+    "pedidos": formatar_pedidos,
+    "faturamento": formatar_faturamento,
+}
+
+
+def formatar_resposta(consulta, valores):
+    if consulta.intencao is None:
+        return f"🤖 Desculpe, não entendi.\n\n{TEXTO_AJUDA}"
+    if consulta.intencao != "resumo" and valores['vazio']:
+        resposta = "Não encontrei dados para o período selecionado."
+    else:
+        resposta = FORMATOS[consulta.intencao](consulta, valores)
+    filtros = descrever_filtros(consulta)
+    return f"{resposta}\n\n*Filtros: {filtros}*" if filtros else resposta
+
+
+@lru_cache(maxsize=TAMANHO_CACHE_RESPOSTAS)
+def _responder_em_cache(consulta, versao):
+    return formatar_resposta(consulta, calcular_valores(consulta, cubo_da_consulta(consulta)))
+
+
+def responder(consulta):
+    if consulta.intencao is None:
+        return formatar_resposta(consulta, {})
+    return _responder_em_cache(consulta, versao_dados())
@@ -0,0 +1,112 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from atrasos_loja import PEDIDOS_MINIMOS_RANKING
+from dados_loja import carregar_base
+from pedidos_loja import carregar_pedidos
+
+# --- ÍNDICE DE CIDADES ---
+# Para cada par (estado, cidade), as posições das suas linhas na base (ou na tabela de pedidos),
+# em ordem de compra. Escolher cidades vira recortar essas listas com busca binária no período,
+# em vez de comparar o texto da cidade em todas as linhas; recortes com muitas cidades (uma região
+# inteira) marcam os grupos num vetor e leem o código de grupo de cada linha do período.
+
+IndiceCidades = namedtuple("IndiceCidades", ["estados", "cidades", "grupo_da_linha", "posicoes", "inicios"])
+
+COLUNAS_RANKING = ["customer_state", "customer_city", "pedidos", "tempo_medio", "frete_medio", "faturamento"]
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def construir_indice(df):
+    # grupo de cada linha (len(estados) = sem estado ou cidade) e as linhas de cada grupo, agrupadas
+    estado = df["customer_state"].cat.codes.to_numpy().astype(np.int64)
+    cidade = df["customer_city"].cat.codes.to_numpy().astype(np.int64)
+    n_cidades = len(df["customer_city"].cat.categories)
+    par = np.where((estado >= 0) & (cidade >= 0), estado * n_cidades + cidade, -1)
+    validas = np.flatnonzero(par >= 0)
+    pares, grupo = np.unique(par[validas], return_inverse=True)
+    grupo_da_linha = np.full(len(df), len(pares), dtype=np.int32)
+    grupo_da_linha[validas] = grupo
+    contagens = np.bincount(grupo, minlength=len(pares))
+    return IndiceCidades(
+        estados=np.asarray(df["customer_state"].cat.categories)[pares // n_cidades],
+        cidades=np.asarray(df["customer_city"].cat.categories)[pares % n_cidades],
+        grupo_da_linha=grupo_da_linha,
+        posicoes=validas[np.argsort(grupo, kind="stable")].astype(np.int32),
+        inicios=np.concatenate(([0], np.cumsum(contagens))),
+    )
+
+
+def carregar_indice(tabela="base"):
+    # índice da base ("base") ou da tabela de pedidos ("pedidos"); refeito só quando ela muda
+    df = carregar_base() if tabela == "base" else carregar_pedidos()
+    with _lock:
+        em_cache = _cache.get(tabela)
+        if em_cache is not None and em_cache[0] is df:
+            return em_cache[1]
+        indice = construir_indice(df)
+        _cache[tabela] = (df, indice)
+        return indice
+
+
+def grupos_selecionados(indice, estados=None, cidades=None):
+    marcados = np.ones(len(indice.estados), dtype=bool)
+    if estados is not None:
+        marcados &= np.isin(indice.estados, list(estados))
+    if cidades:
+        marcados &= np.isin(indice.cidades, list(cidades))
+    return np.flatnonzero(marcados)
+
+
+def cidades_no_periodo(indice, inicio, fim, estados=None):
+    # cidades (em ordem alfabética) com alguma linha nas posições [inicio, fim) dos estados pedidos
+    presentes = np.bincount(indice.grupo_da_linha[inicio:fim], minlength=len(indice.estados) + 1)[:-1] > 0
+    grupos = grupos_selecionados(indice, estados)
+    return sorted(set(indice.cidades[grupos[presentes[grupos]]]))
+
+
+def linhas_selecionadas(indice, inicio, fim, estados=None, cidades=None):
+    # posições, em ordem de compra, das linhas em [inicio, fim) dos estados e cidades pedidos
+    grupos = grupos_selecionados(indice, estados, cidades)
+    if cidades:
+        # poucas cidades: recorta a lista de posições de cada uma no período
+        partes = []
+        for grupo in grupos:
+            posicoes = indice.posicoes[indice.inicios[grupo]:indice.inicios[grupo + 1]]
+            partes.append(posicoes[np.searchsorted(posicoes, inicio):np.searchsorted(posicoes, fim)])
+        return np.sort(np.concatenate(partes)) if partes else np.empty(0, dtype=np.int32)
+    marcados = np.zeros(len(indice.estados) + 1, dtype=bool)
+    marcados[grupos] = True
+    return inicio + np.flatnonzero(marcados[indice.grupo_da_linha[inicio:fim]])
+
+
+def ranking_cidades(pedidos, indice, inicio, fim, estados=None, cidades=None, ordem="pedidos", n=10):
+    # `pedidos` é a tabela de pedidos e `indice` o índice dela; uma passada de bincount pelo período
+    # soma todas as cidades de uma vez. Tempo e frete só ranqueiam cidades com pedidos suficientes.
+    grupo = indice.grupo_da_linha[inicio:fim]
+    total = len(indice.estados) + 1
+    periodo = pedidos.iloc[inicio:fim]
+    tempo = periodo["tempo_entrega"].to_numpy(dtype=np.float64)
+    entregues = ~np.isnan(tempo)
+    quantidade = np.bincount(grupo, minlength=total)[:-1]
+    qtd_tempo = np.bincount(grupo, weights=entregues, minlength=total)[:-1]
+    soma_tempo = np.bincount(grupo, weights=np.where(entregues, tempo, 0), minlength=total)[:-1]
+    tabela = pd.DataFrame({
+        "customer_state": indice.estados,
+        "customer_city": indice.cidades,
+        "pedidos": quantidade,
+        "tempo_medio": np.divide(soma_tempo, qtd_tempo, out=np.full(len(qtd_tempo), np.nan), where=qtd_tempo > 0),
+        "frete_medio": np.bincount(grupo, weights=periodo["frete"], minlength=total)[:-1] / np.maximum(quantidade, 1),
+        "faturamento": np.bincount(grupo, weights=periodo["faturamento"], minlength=total)[:-1],
+    })
+    tabela = tabela.iloc[grupos_selecionados(indice, estados, cidades)]
+    tabela = tabela[tabela["pedidos"] > 0]
+    if ordem != "pedidos":
+        relevantes = tabela[tabela["pedidos"] >= PEDIDOS_MINIMOS_RANKING]
+        tabela = relevantes if not relevantes.empty else tabela
+    return tabela.nlargest(n, ordem)[COLUNAS_RANKING].reset_index(drop=True)
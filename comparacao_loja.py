@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from cubo_loja import METRICAS, kpis_tabela, rotular_intervalos
+
+# --- COMPARAÇÃO ENTRE PERÍODOS ---
+# Período atual x período anterior (mesma duração, logo antes) x mesmo período do ano anterior,
+# para todos os KPIs de uma vez. As linhas do cubo de cada janela são rotuladas com a janela e
+# um único groupby soma tudo; os recortes por estado e categoria reaproveitam o mesmo rótulo.
+
+JANELAS = ["atual", "anterior", "ano_anterior"]
+KPIS = ["faturamento", "pedidos", "ticket_medio", "nota_media", "tempo_medio_entrega", "frete_medio"]
+
+
+def get_periodo_anterior(data_inicio_atual, data_fim_atual):
+    duracao = (data_fim_atual - data_inicio_atual)
+    fim_anterior = data_inicio_atual - timedelta(days=1)
+    inicio_anterior = fim_anterior - duracao
+    return inicio_anterior, fim_anterior
+
+
+def janelas_comparacao(inicio, fim):
+    return {
+        "atual": (inicio, fim),
+        "anterior": get_periodo_anterior(inicio, fim),
+        "ano_anterior": (inicio - relativedelta(years=1), fim - relativedelta(years=1)),
+    }
+
+
+def inicio_das_janelas(inicio, fim):
+    # primeiro dia coberto por alguma janela: até onde o cubo precisa ir para trás
+    return min(i for i, _ in janelas_comparacao(inicio, fim).values())
+
+
+def _variacao(atual, base):
+    return (atual - base) / base.where(base != 0) * 100
+
+
+def _montar(somas, grupos):
+    tabela = kpis_tabela(somas).unstack("janela").reindex(columns=JANELAS, level="janela")
+    if grupos is None:
+        tabela = tabela.reindex(["Total"])
+    colunas = {}
+    for kpi in KPIS:
+        atual = tabela.get((kpi, "atual"), pd.Series(np.nan, index=tabela.index))
+        colunas[(kpi, "atual")] = atual
+        for janela in JANELAS[1:]:
+            base = tabela.get((kpi, janela), pd.Series(np.nan, index=tabela.index))
+            colunas[(kpi, janela)] = base
+            colunas[(kpi, f"var_{janela}")] = _variacao(atual, base)
+    return pd.DataFrame(colunas, index=tabela.index)
+
+
+def comparar(cubo, inicio, fim, dimensoes=("customer_state", "product_category_name_english")):
+    # cubo ordenado por dia (como o de cubo_loja). Devolve {None: total, dimensão: tabela}, com
+    # colunas (kpi, atual|anterior|ano_anterior|var_anterior|var_ano_anterior); variações em %.
+    janelas = janelas_comparacao(inicio, fim)
+    dias = cubo["dia"]
+    inicios = [dias.searchsorted(pd.Timestamp(i), side="left") for i, _ in janelas.values()]
+    fins = [dias.searchsorted(pd.Timestamp(f + timedelta(days=1)), side="left") for _, f in janelas.values()]
+    rotulos, posicoes = rotular_intervalos(inicios, fins)
+    rotulado = cubo.iloc[posicoes].assign(janela=pd.Categorical.from_codes(rotulos, categories=JANELAS))
+
+    resultado = {}
+    for dimensao in (None, *dimensoes):
+        chaves = ["janela"] if dimensao is None else [dimensao, "janela"]
+        somas = rotulado.groupby(chaves, observed=True)[METRICAS].sum()
+        if dimensao is None:
+            somas.index = pd.MultiIndex.from_arrays([["Total"] * len(somas), somas.index], names=[None, "janela"])
+        resultado[dimensao] = _montar(somas, dimensao)
+    return resultado
@@ -0,0 +1,205 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dados_loja import carregar_base, carregar_linhas_lojas, derivado_do_snapshot, filtrar_periodo, incremento_da_base, reais
+from pedidos_loja import linhas_por_pedido
+
+# --- CUBO DIÁRIO PRÉ-AGREGADO ---
+# Uma linha por (dia, vendedor, estado, categoria, tipo de pagamento) com somas e contagens.
+# KPIs e gráficos de qualquer período saem da soma das linhas do cubo, sem voltar aos pedidos.
+#
+# Contagem de pedidos distintos: cada linha recebe peso 1 / (linhas do pedido), então
+# os pesos de um pedido somam exatamente 1. Como todas as linhas de um pedido caem no mesmo dia,
+# a contagem por período é exata; ao recortar por categoria/pagamento/vendedor, um pedido
+# dividido entre células é contado proporcionalmente às suas linhas. Quem precisa da contagem
+# exata num desses recortes monta o cubo só com as linhas dele (ver bot_loja.cubo_da_consulta).
+# O faturamento vem de faturamento_rateado (cada pagamento entra uma vez por pedido, ver dados_loja).
+
+DIMENSOES = ["dia", "seller_id", "customer_state", "product_category_name_english", "payment_type"]
+
+METRICAS = ["itens", "pedidos", "faturamento", "frete", "soma_tempo_entrega", "qtd_tempo_entrega", "soma_nota", "qtd_nota", "atrasados", "qtd_prazo"]
+
+DIAS_ORDEM = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def construir_cubo(df, por_loja=False):
+    compra = df["order_purchase_timestamp"]
+    if compra.dt.tz is not None:
+        compra = compra.dt.tz_localize(None)
+    pedido = df["pedido"].to_numpy(dtype=np.int64)
+    if por_loja:
+        # um pedido dividido entre lojas conta uma vez para cada loja, como no cubo de uma loja só
+        lojas = df["seller_id"].cat.codes.to_numpy(dtype=np.int64) + 1
+        pedido = pedido * (lojas.max() + 1 if len(lojas) else 1) + lojas
+    peso_pedido = 1.0 / linhas_por_pedido(pedido)
+    atraso = df["atraso_dias"].to_numpy(dtype=np.float64)
+    tempo = df["tempo_entrega"].to_numpy(dtype=np.float64)
+    nota = df["review_score"].to_numpy(dtype=np.float64)
+    linhas = pd.DataFrame({
+        "dia": compra.dt.normalize(),
+        "seller_id": df["seller_id"],
+        "customer_state": df["customer_state"],
+        "product_category_name_english": df["product_category_name_english"],
+        "payment_type": df["payment_type"],
+        # cada linha é item x pagamento: itens e frete pesam 1/pagamentos, pedidos 1/linhas do pedido
+        # a base guarda float32 (ou float64, ver dados_loja.compactar_reais); o cubo acumula em float64
+        "itens": df["peso_item"].astype(np.float64),
+        "pedidos": peso_pedido,
+        "faturamento": df["faturamento_rateado"],
+        "frete": reais(df["freight_value"]) * df["peso_item"].to_numpy(dtype=np.float64),
+        # tempo de entrega e nota são do pedido: as médias pesam cada pedido uma vez, não uma vez por linha
+        "soma_tempo_entrega": peso_pedido * np.nan_to_num(tempo),
+        "qtd_tempo_entrega": peso_pedido * ~np.isnan(tempo),
+        "soma_nota": peso_pedido * np.nan_to_num(nota),
+        "qtd_nota": peso_pedido * ~np.isnan(nota),
+        # pedidos entregues com prazo estimado e, entre eles, os atrasados (mesmo peso de "pedidos")
+        "atrasados": peso_pedido * (atraso > 0),
+        "qtd_prazo": peso_pedido * ~np.isnan(atraso),
+    })
+    linhas = linhas.dropna(subset=["dia"])
+    cubo = linhas.groupby(DIMENSOES, observed=True, dropna=False, sort=True)[METRICAS].sum()
+    # ordenado por dia, o cubo aceita a mesma busca binária de filtrar_periodo
+    return cubo.reset_index()
+
+
+def atualizar_cubo(cubo, anterior, novas):
+    # cubo de `anterior` + `novas` sem reagrupar a base inteira: só os dias a partir da primeira
+    # linha nova são reagrupados. Devolve None se algum pedido novo já tinha itens na base
+    # (o peso de todos os itens dele muda e o cubo precisa ser refeito): nesse caso anexar_linhas
+    # recodifica a base e os códigos das linhas novas deixam de vir depois dos anteriores.
+    if len(anterior) and len(novas) and novas["pedido"].min() <= anterior["pedido"].max():
+        return None
+    novo = construir_cubo(novas)
+    if novo.empty:
+        return cubo
+    cubo = cubo.astype({c: novo[c].dtype for c in DIMENSOES if isinstance(novo[c].dtype, pd.CategoricalDtype)})
+    corte = cubo["dia"].searchsorted(novo["dia"].iloc[0], side="left")
+    fim = pd.concat([cubo.iloc[corte:], novo], ignore_index=True)
+    fim = fim.groupby(DIMENSOES, observed=True, dropna=False, sort=True)[METRICAS].sum().reset_index()
+    return pd.concat([cubo.iloc[:corte], fim], ignore_index=True)
+
+
+def carregar_cubo():
+    # cubo da base inteira, refeito apenas quando a base compartilhada é recarregada;
+    # se a base só ganhou linhas novas, o cubo anterior é atualizado com elas
+    base = carregar_base()
+    with _lock:
+        em_cache = _cache.get("base")
+        if em_cache is not None and em_cache[0] is base:
+            return em_cache[1]
+        cubo = None
+        incremento = incremento_da_base(base)
+        if em_cache is not None and incremento is not None and incremento[0] is em_cache[0]:
+            cubo = atualizar_cubo(em_cache[1], *incremento)
+        if cubo is None:
+            cubo = derivado_do_snapshot("cubo", base)
+        if cubo is None:
+            cubo = construir_cubo(base)
+        _cache["base"] = (base, cubo)
+        return cubo
+
+
+def carregar_cubo_lojas():
+    # o cubo das linhas do portal do vendedor (horário da loja, só pedidos entregues) para todas
+    # as lojas de uma vez, com pedidos contados por loja: filtrado por uma loja, é o cubo do portal
+    base = carregar_base()
+    with _lock:
+        em_cache = _cache.get("lojas")
+        if em_cache is not None and em_cache[0] is base:
+            return em_cache[1]
+        cubo = construir_cubo(carregar_linhas_lojas(), por_loja=True)
+        _cache["lojas"] = (base, cubo)
+        return cubo
+
+
+def consultar_periodo(cubo, inicio, fim):
+    return filtrar_periodo(cubo, inicio, fim, coluna="dia")
+
+
+def _dividir(numerador, denominador):
+    return numerador / denominador if denominador > 0 else 0
+
+
+# Somas em float dependem da ordem das linhas (o chat soma um recorte do cubo, o lote subtrai
+# somas acumuladas) e um KPI exatamente no meio de dois valores exibidos (frete de R$ 19,745,
+# 93,75% no prazo, um pedido dividido entre recortes que vale x.5) cairia ora para um lado, ora
+# para o outro. As somas perdem esse ruído (6 casas) antes das contas; as contagens arredondam
+# meio para cima e o faturamento, um número inteiro de centavos (ver dados_loja), para 2 casas.
+CASAS_SOMAS = 6
+
+
+def _contagem(pesos):
+    return np.floor(pesos + 0.5)
+
+
+def kpis(cubo_periodo):
+    return kpis_de_totais(cubo_periodo[METRICAS].sum())
+
+
+def kpis_de_totais(totais):
+    # np.round, como em kpis_tabela: o round do Python pode decidir diferente um valor no meio
+    totais = {metrica: float(np.round(totais[metrica], CASAS_SOMAS)) for metrica in METRICAS}
+    faturamento = float(np.round(totais["faturamento"], 2))
+    pedidos = int(_contagem(totais["pedidos"]))
+    return {
+        "faturamento": faturamento,
+        "pedidos": pedidos,
+        "ticket_medio": _dividir(faturamento, pedidos),
+        "nota_media": totais["soma_nota"] / totais["qtd_nota"] if totais["qtd_nota"] > 0 else float("nan"),
+        "tempo_medio_entrega": totais["soma_tempo_entrega"] / totais["qtd_tempo_entrega"] if totais["qtd_tempo_entrega"] > 0 else float("nan"),
+        "frete_medio": totais["frete"] / totais["itens"] if totais["itens"] > 0 else float("nan"),
+        "atrasados": int(_contagem(totais["atrasados"])),
+        "taxa_no_prazo": 1 - totais["atrasados"] / totais["qtd_prazo"] if totais["qtd_prazo"] > 0 else float("nan"),
+    }
+
+
+def kpis_tabela(somas):
+    # mesma conta de kpis_de_totais, para uma tabela de somas (uma linha por grupo)
+    somas = somas[METRICAS].astype(np.float64).round(CASAS_SOMAS)
+    faturamento = somas["faturamento"].round(2)
+    pedidos = _contagem(somas["pedidos"]).astype("int64")
+    return pd.DataFrame({
+        "faturamento": faturamento,
+        "pedidos": pedidos,
+        "ticket_medio": (faturamento / pedidos.where(pedidos > 0)).fillna(0),
+        "nota_media": somas["soma_nota"] / somas["qtd_nota"].where(somas["qtd_nota"] > 0),
+        "tempo_medio_entrega": somas["soma_tempo_entrega"] / somas["qtd_tempo_entrega"].where(somas["qtd_tempo_entrega"] > 0),
+        "frete_medio": somas["frete"] / somas["itens"].where(somas["itens"] > 0),
+        "atrasados": _contagem(somas["atrasados"]).astype("int64"),
+        "taxa_no_prazo": 1 - somas["atrasados"] / somas["qtd_prazo"].where(somas["qtd_prazo"] > 0),
+    }, index=somas.index)
+
+
+def rotular_intervalos(inicios, fins):
+    # junta as posições [inicio, fim) de vários intervalos e diz a qual intervalo cada uma pertence;
+    # linhas em intervalos sobrepostos aparecem uma vez para cada intervalo
+    inicios, fins = np.asarray(inicios), np.asarray(fins)
+    tamanhos = fins - inicios
+    rotulos = np.repeat(np.arange(len(inicios)), tamanhos)
+    deslocamento = np.repeat(inicios - (np.cumsum(tamanhos) - tamanhos), tamanhos)
+    return rotulos, np.arange(tamanhos.sum()) + deslocamento
+
+
+def somar_por(cubo_periodo, coluna, metrica):
+    return cubo_periodo.groupby(coluna, observed=True)[metrica].sum()
+
+
+def media_por(cubo_periodo, coluna, soma, quantidade):
+    grupos = cubo_periodo.groupby(coluna, observed=True)[[soma, quantidade]].sum()
+    grupos = grupos[grupos[quantidade] > 0]
+    return grupos[soma] / grupos[quantidade]
+
+
+def faturamento_mensal(cubo_periodo):
+    ano_mes = cubo_periodo["dia"].dt.to_period("M").astype(str).rename("ano_mes")
+    return cubo_periodo.groupby(ano_mes)["faturamento"].sum()
+
+
+def faturamento_dia_semana(cubo_periodo):
+    dia_da_semana = cubo_periodo["dia"].dt.day_name().rename("dia_da_semana")
+    return cubo_periodo.groupby(dia_da_semana)["faturamento"].sum().reindex(DIAS_ORDEM)
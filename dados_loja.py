@@ -0,0 +1,691 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import threading
+import weakref
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from regioes_loja import regiao_dos_estados
+
+# --- CAMADA DE DADOS COMPARTILHADA ---
+# O CSV é convertido uma única vez para Parquet (colunar e tipado) e todas as páginas
+# leem do mesmo DataFrame em memória. O Parquet só é refeito quando o CSV muda.
+# Uma segunda cópia, ordenada por vendedor e com um índice vendedor -> linhas, permite ao
+# portal do vendedor ler só as linhas de uma loja, sem carregar a base inteira.
+# O CSV recebe linhas novas no fim todo dia: quando o arquivo só cresceu, apenas o trecho novo
+# é lido e anexado à base em memória. No disco, o trecho vira um Parquet pequeno na pasta de
+# anexos, encadeado à versão anterior; o Parquet principal só é regravado pela conversão completa
+# ou por `python dados_loja.py` (compactar_parquet), fora das requisições.
+# Cada arquivo guarda nos metadados a versão do CSV de onde veio (marca_csv): quem lê confere a
+# marca do próprio arquivo lido, sem depender de um segundo arquivo gravado em outro momento.
+# O CSV tem uma linha por item x pagamento: o valor de cada pagamento se repete em todos os itens
+# do pedido e cada item se repete em todos os pagamentos. Somar payment_value nas linhas conta o
+# mesmo pagamento várias vezes; por isso cada linha recebe na carga (adicionar_colunas_pedido):
+# - pedido: código inteiro do order_id, para contar pedidos sem hash de texto;
+# - peso_item: 1 / pagamentos do pedido; somado, conta cada item uma vez;
+# - faturamento_rateado: cada pagamento distinto do pedido entra uma vez, repartido entre os
+#   itens pelo preço em centavos inteiros. A soma em qualquer recorte de pedidos inteiros é o
+#   faturamento correto, sem erro de arredondamento.
+# Para a primeira visita depois de um deploy não esperar nada disso, `python snapshot_loja.py`
+# grava um snapshot em Arrow IPC sem compressão (base, pedidos, cubo e as linhas de cada loja já
+# preparadas, com horário de Brasília e colunas derivadas). Os arquivos são mapeados na memória
+# (ler_snapshot): abrir custa milissegundos e os workers da máquina dividem as mesmas páginas do
+# cache do sistema operacional. Um snapshot de outra versão do CSV é ignorado.
+
+CAMINHO_CSV = "dataset_olist_final_limpo.csv"
+CAMINHO_PARQUET = "dataset_olist_final_limpo.parquet"
+CAMINHO_SNAPSHOT = "dataset_olist_final_limpo.snapshot"
+FUSO_LOJA = "America/Sao_Paulo"
+
+COLUNAS_DATA = ["order_purchase_timestamp", "order_delivered_customer_date", "order_estimated_delivery_date"]
+
+# Esquema compacto aplicado já na leitura do CSV (vários workers do Streamlit por máquina: a
+# memória é o limite). Texto repetido vira categoria, ids únicos ficam em strings do Arrow (sem
+# um objeto Python por linha) e números usam 32 bits. Valores em reais têm 2 casas: o float32 só
+# devolve o centavo certo (ver reais) abaixo de 2**17 = R$ 131.072, acima disso o espaçamento
+# entre floats passa de meio centavo. Por isso as colunas em reais são lidas em float64 e só
+# viram float32 se todos os valores ficam abaixo desse limite (compactar_reais). Somas de
+# dinheiro voltam para float64 (ver reais) antes de acumular.
+COLUNAS_REAIS = ["price", "freight_value", "payment_value"]
+LIMITE_REAIS_FLOAT32 = 2**17
+
+TIPOS_CSV = {
+    "order_id": "string[pyarrow]",
+    "customer_id": "string[pyarrow]",
+    "seller_id": "category",
+    "customer_state": "category",
+    "customer_city": "category",
+    "product_category_name_english": "category",
+    "payment_type": "category",
+    "price": "float64",
+    "freight_value": "float64",
+    "payment_value": "float64",
+    "review_score": "float32",
+}
+
+# muda sempre que o formato do Parquet (ou do snapshot) muda, para forçar a reconstrução de arquivos antigos
+VERSAO_FORMATO = 12
+
+LINHAS_POR_GRUPO_VENDEDORES = 10_000
+
+# quanto do fim do CSV já lido é conferido para aceitar o arquivo novo como "o antigo + linhas no fim"
+BYTES_CONFERIDOS = 64 * 1024
+
+_cache = {}
+_cache_indice = {}
+_incrementos = {}
+_lock = threading.Lock()
+
+
+def reais(serie):
+    # float32 -> float64 arredondado ao centavo: 56.02 volta a ser 56.02, não 56.0200004
+    return np.round(serie.to_numpy(dtype=np.float64), 2)
+
+
+def frete_medio(df, coluna=None):
+    # frete por item, a mesma conta do cubo (frete / itens): cada linha é item x pagamento e a
+    # média simples de freight_value contaria o item uma vez por pagamento
+    itens = df["peso_item"].astype(np.float64)
+    frete = pd.Series(np.nan_to_num(reais(df["freight_value"])) * itens.to_numpy(), index=df.index)
+    if coluna is None:
+        return frete.sum() / itens.sum() if itens.sum() > 0 else float("nan")
+    grupos = df[coluna]
+    media = frete.groupby(grupos, observed=True).sum() / itens.groupby(grupos, observed=True).sum()
+    return media.rename("freight_value")
+
+
+def compactar_reais(df):
+    # float32 só quando a coluna inteira cabe abaixo de LIMITE_REAIS_FLOAT32; senão fica em float64
+    for coluna in COLUNAS_REAIS:
+        if coluna in df and df[coluna].abs().max() < LIMITE_REAIS_FLOAT32:
+            df[coluna] = df[coluna].astype(np.float32)
+    return df
+
+
+def _horario_local(datas):
+    # sem o fuso, no horário local: to_period e a comparação com o prazo (uma data sem fuso) usam o dia local
+    return datas.dt.tz_localize(None) if datas.dt.tz is not None else datas
+
+
+def _dia_na_loja(datas):
+    # dia do calendário no fuso da loja; horários sem fuso são os do CSV, em UTC
+    if datas.dt.tz is None:
+        datas = datas.dt.tz_localize("UTC")
+    return datas.dt.tz_convert(FUSO_LOJA).dt.tz_localize(None).dt.normalize()
+
+
+def adicionar_colunas_derivadas(df):
+    df["tempo_entrega"] = (df["order_delivered_customer_date"] - df["order_purchase_timestamp"]).dt.days.astype(np.float32)
+    # dias de atraso frente ao prazo estimado, contados em dias do calendário (> 0 é atraso). O prazo
+    # é uma data da loja: a entrega é levada ao fuso da loja na base e nas linhas do portal, para a
+    # mesma entrega contar o mesmo atraso nas duas
+    entrega = _dia_na_loja(df["order_delivered_customer_date"])
+    df["atraso_dias"] = (entrega - df["order_estimated_delivery_date"].dt.normalize()).dt.days.astype(np.float32)
+    compra = _horario_local(df["order_purchase_timestamp"])
+    df["ano_mes"] = compra.dt.to_period("M").astype(str).astype("category")
+    df["dia_da_semana"] = df["order_purchase_timestamp"].dt.dayofweek.astype("Int8")  # 0 = segunda-feira
+    df["regiao"] = regiao_dos_estados(df["customer_state"])
+    return df
+
+
+def preparar_vendedor(df):
+    # linhas do portal do vendedor: horários do CSV (UTC) no fuso da loja e só pedidos entregues;
+    # o fuso muda o dia/mês de alguns pedidos, então as colunas derivadas são refeitas
+    horarios = {}
+    for coluna in ["order_purchase_timestamp", "order_delivered_customer_date"]:
+        datas = df[coluna] if df[coluna].dt.tz is not None else df[coluna].dt.tz_localize("UTC")
+        horarios[coluna] = datas.dt.tz_convert(FUSO_LOJA)
+    df = df.assign(**horarios).dropna(subset=["order_delivered_customer_date", "order_purchase_timestamp"], ignore_index=True)
+    return adicionar_colunas_derivadas(df)
+
+
+def adicionar_colunas_pedido(df):
+    # códigos na ordem de aparição: com a base ordenada por compra, os pedidos também ficam
+    codigos, _ = pd.factorize(df["order_id"], use_na_sentinel=False)
+    # pagamento distinto = (pedido, tipo, valor); o CSV não traz o número sequencial do pagamento
+    pagamentos = pd.DataFrame({
+        "pedido": codigos,
+        "tipo": pd.factorize(df["payment_type"], use_na_sentinel=False)[0],
+        "valor": reais(df["payment_value"]),
+    })
+    pagamento = pagamentos.groupby(["pedido", "tipo", "valor"], sort=False, dropna=False).ngroup().to_numpy()
+    pedido_do_pagamento = np.zeros(pagamento.max() + 1 if len(pagamento) else 0, dtype=np.int64)
+    pedido_do_pagamento[pagamento] = codigos
+    pagamentos_por_pedido = np.bincount(pedido_do_pagamento, minlength=codigos.max() + 1 if len(codigos) else 0)
+
+    df["pedido"] = codigos.astype(np.int32)
+    df["peso_item"] = (1.0 / pagamentos_por_pedido[codigos]).astype(np.float32)
+    # fica em float64: é a coluna somada para o faturamento
+    df["faturamento_rateado"] = _ratear_centavos(pagamento, np.nan_to_num(pagamentos["valor"].to_numpy()), np.nan_to_num(reais(df["price"])))
+    return df
+
+
+def _ratear_centavos(grupo, valor, preco):
+    # Reparte o valor de cada grupo entre as suas linhas pelo preço (ou em partes iguais, se o grupo
+    # não tem preço), em centavos inteiros: cada linha recebe o piso da sua parte e os centavos que
+    # sobram vão para as linhas com as maiores frações. As partes de um grupo somam exatamente o
+    # valor, então qualquer soma de linhas é um número inteiro de centavos.
+    centavos = np.round(valor * 100).astype(np.int64)
+    peso = np.round(preco * 100).astype(np.int64)
+    soma_peso = np.bincount(grupo, weights=peso).astype(np.int64)[grupo]
+    sem_preco = soma_peso <= 0
+    peso[sem_preco], soma_peso[sem_preco] = 1, np.bincount(grupo)[grupo][sem_preco]
+    piso, resto = np.divmod(centavos * peso, soma_peso)
+    faltam = centavos - np.bincount(grupo, weights=piso).astype(np.int64)[grupo]
+    # dentro de cada grupo, as linhas em ordem decrescente de fração (resto / soma_peso)
+    ordem = np.lexsort((-resto / soma_peso, grupo))
+    tamanhos = np.bincount(grupo)
+    posicao = np.arange(len(grupo)) - np.repeat(np.cumsum(tamanhos) - tamanhos, tamanhos)
+    extra = np.zeros(len(grupo), dtype=np.int64)
+    extra[ordem] = posicao < faltam[ordem]
+    return (piso + extra) / 100
+
+
+def _assinatura_csv(caminho_csv):
+    # mtime + tamanho identificam uma versão do CSV sem precisar ler o arquivo inteiro
+    info = os.stat(caminho_csv)
+    return {"mtime_ns": info.st_mtime_ns, "tamanho": info.st_size, "versao": VERSAO_FORMATO}
+
+
+def _fim_lido(caminho_csv, tamanho):
+    with open(caminho_csv, "rb") as f:
+        f.seek(max(0, tamanho - BYTES_CONFERIDOS))
+        return f.read(tamanho - f.tell())
+
+
+def _marca_csv(caminho_csv, assinatura):
+    # assinatura + hash do fim do trecho lido: permite reconhecer depois se o arquivo só cresceu
+    return {**assinatura, "cauda": hashlib.sha1(_fim_lido(caminho_csv, assinatura["tamanho"])).hexdigest()}
+
+
+def _mesma_versao(marca, assinatura):
+    return {chave: marca.get(chave) for chave in assinatura} == assinatura
+
+
+def _foi_anexado(caminho_csv, marca, assinatura):
+    # o conteúdo já lido continua igual no começo do arquivo e termina numa quebra de linha
+    tamanho = marca.get("tamanho", 0)
+    if "cauda" not in marca or marca.get("versao") != assinatura["versao"] or not 0 < tamanho < assinatura["tamanho"]:
+        return False
+    fim = _fim_lido(caminho_csv, tamanho)
+    return fim.endswith(b"\n") and hashlib.sha1(fim).hexdigest() == marca["cauda"]
+
+
+def _caminho_vendedores(caminho_parquet):
+    return os.path.splitext(caminho_parquet)[0] + ".vendedores.parquet"
+
+
+def _pasta_anexos(caminho_parquet):
+    return os.path.splitext(caminho_parquet)[0] + ".anexos"
+
+
+def _caminho_anexo(caminho_parquet, anterior):
+    # o nome vem da marca em que o anexo começa: o próximo elo da cadeia é achado sem listar a pasta
+    chave = hashlib.sha1(json.dumps(anterior, sort_keys=True).encode()).hexdigest()[:16]
+    return os.path.join(_pasta_anexos(caminho_parquet), f"{anterior['tamanho']:015d}.{chave}.parquet")
+
+
+def _com_marca(tabela, marca, metadados=None):
+    return tabela.replace_schema_metadata({**(tabela.schema.metadata or {}), **(metadados or {}), b"marca_csv": json.dumps(marca).encode()})
+
+
+def _marca_do_esquema(esquema):
+    try:
+        marca = json.loads(esquema.metadata[b"marca_csv"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return marca if marca.get("versao") == VERSAO_FORMATO else None
+
+
+def _ler_marca(caminho):
+    try:
+        return _marca_do_esquema(pq.read_schema(caminho))
+    except (OSError, ValueError):
+        return None
+
+
+class _TrechoArquivo(io.RawIOBase):
+    # bytes [inicio, fim) de um arquivo, lidos sob demanda: o pandas lê o CSV do disco em blocos,
+    # sem uma cópia do trecho inteiro em memória
+    def __init__(self, caminho, inicio, fim):
+        super().__init__()
+        self._arquivo = open(caminho, "rb")
+        self._arquivo.seek(inicio)
+        self._restante = fim - inicio
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        lidos = self._arquivo.readinto(memoryview(destino)[:max(0, min(len(destino), self._restante))])
+        self._restante -= lidos
+        return lidos
+
+    def close(self):
+        self._arquivo.close()
+        super().close()
+
+
+def _ler_trecho(caminho_csv, inicio, fim, colunas, cabecalho):
+    with io.BufferedReader(_TrechoArquivo(caminho_csv, inicio, fim)) as arquivo:
+        df = pd.read_csv(
+            arquivo,
+            header=0 if cabecalho else None,
+            names=None if cabecalho else colunas,
+            parse_dates=[c for c in COLUNAS_DATA if c in colunas],
+            dtype={c: tipo for c, tipo in TIPOS_CSV.items() if c in colunas},
+        )
+    df = ordenar_por_compra(compactar_reais(df))
+    return adicionar_colunas_pedido(adicionar_colunas_derivadas(df))
+
+
+def ler_csv(caminho_csv, tamanho=None):
+    # lê só os `tamanho` primeiros bytes: linhas anexadas durante a leitura ficam para o próximo incremento
+    colunas = pd.read_csv(caminho_csv, nrows=0).columns
+    fim = os.path.getsize(caminho_csv) if tamanho is None else tamanho
+    return _ler_trecho(caminho_csv, 0, fim, colunas, cabecalho=True)
+
+
+def ler_trecho_csv(caminho_csv, inicio, fim):
+    # linhas entre os bytes `inicio` e `fim` (sem cabeçalho), com os mesmos tipos de ler_csv
+    colunas = pd.read_csv(caminho_csv, nrows=0).columns
+    return _ler_trecho(caminho_csv, inicio, fim, colunas, cabecalho=False)
+
+
+def anexar_linhas(df, novas):
+    # devolve (base com as linhas novas, linhas novas), as duas com as mesmas categorias
+    tipos = {
+        coluna: pd.CategoricalDtype(tipo.categories.union(novas[coluna].cat.categories))
+        for coluna, tipo in df.dtypes.items() if isinstance(tipo, pd.CategoricalDtype)
+    }
+    df, novas = df.astype(tipos), novas.astype(tipos)
+    # pedido que já tinha itens na base: o rateio dele muda, então as colunas de pedido são refeitas
+    continua = len(df) > 0 and df["order_id"].isin(novas["order_id"]).any()
+    if len(df) and not continua:
+        novas["pedido"] += df["pedido"].max() + 1
+    juntas = pd.concat([df, novas], ignore_index=True)
+    # as linhas novas costumam ser as mais recentes; só reordena se alguma cair antes do fim da base
+    ultima = df["order_purchase_timestamp"].iloc[-1] if len(df) else pd.NaT
+    primeira_nova = novas["order_purchase_timestamp"].iloc[0] if len(novas) else pd.NaT
+    if pd.notna(primeira_nova) and len(df) and (pd.isna(ultima) or primeira_nova < ultima):
+        juntas = ordenar_por_compra(juntas)
+    if continua:
+        juntas = adicionar_colunas_pedido(juntas)
+    return juntas, novas
+
+
+def ordenar_por_compra(df):
+    return df.sort_values("order_purchase_timestamp", kind="stable", na_position="last", ignore_index=True)
+
+
+def _limite_dia(dia, tz):
+    limite = pd.Timestamp(dia)
+    if tz is not None:
+        limite = limite.tz_localize(tz, ambiguous=True, nonexistent="shift_forward")
+    return limite
+
+
+def posicoes_periodo(df, inicio, fim, coluna="order_purchase_timestamp"):
+    # df precisa estar ordenado por `coluna` (ver ordenar_por_compra): a busca binária acha a
+    # primeira linha do período e a primeira depois dele
+    datas = df[coluna]
+    tz = datas.dt.tz
+    pos_inicio = datas.searchsorted(_limite_dia(inicio, tz), side="left")
+    pos_fim = datas.searchsorted(_limite_dia(fim + timedelta(days=1), tz), side="left")
+    return int(pos_inicio), int(pos_fim)
+
+
+def filtrar_periodo(df, inicio, fim, coluna="order_purchase_timestamp"):
+    # recorte do DataFrame nas posições do período, sem varrer nem copiar as linhas
+    pos_inicio, pos_fim = posicoes_periodo(df, inicio, fim, coluna)
+    return df.iloc[pos_inicio:pos_fim]
+
+
+def _escrever_tabela(tabela, caminho, **opcoes):
+    # escreve em arquivo temporário e troca de uma vez, para outros processos nunca lerem um Parquet pela metade
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    pq.write_table(tabela, temporario, **opcoes)
+    os.replace(temporario, caminho)
+
+
+def escrever_particao_vendedores(df, caminho, marca):
+    por_vendedor = df.sort_values(["seller_id", "order_purchase_timestamp"], kind="stable", ignore_index=True)
+    vendedores = por_vendedor["seller_id"]
+    inicios = np.flatnonzero(vendedores.ne(vendedores.shift()).to_numpy())
+    quantidades = np.diff(np.append(inicios, len(vendedores)))
+    indice = {
+        vendedor: [int(inicio), int(quantidade)]
+        for vendedor, inicio, quantidade in zip(vendedores.iloc[inicios], inicios, quantidades)
+        if pd.notna(vendedor)
+    }
+    tabela = _com_marca(pa.Table.from_pandas(por_vendedor, preserve_index=False), marca, {b"indice_vendedores": json.dumps(indice).encode()})
+    _escrever_tabela(tabela, caminho, row_group_size=LINHAS_POR_GRUPO_VENDEDORES)
+    return indice
+
+
+def _caminho_snapshot(nome, pasta):
+    return os.path.join(pasta, f"{nome}.arrow")
+
+
+def escrever_snapshot(nome, df, marca, pasta=CAMINHO_SNAPSHOT, metadados=None):
+    # Arrow IPC sem compressão: lido por mapeamento, sem decodificar; `marca` é a versão do CSV de origem
+    os.makedirs(pasta, exist_ok=True)
+    tabela = _com_marca(pa.Table.from_pandas(df, preserve_index=False), marca, metadados)
+    caminho = _caminho_snapshot(nome, pasta)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with pa.OSFile(temporario, "wb") as arquivo, pa.ipc.new_file(arquivo, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    # um processo que ainda tem o arquivo antigo mapeado continua lendo a versão antiga
+    os.replace(temporario, caminho)
+
+
+def escrever_snapshot_vendedores(base, marca, pasta=CAMINHO_SNAPSHOT):
+    # as linhas de todas as lojas já preparadas (preparar_vendedor), em sequência por loja e por
+    # compra, com o índice loja -> [início, quantidade] nos metadados
+    por_vendedor = preparar_vendedor(base).sort_values("seller_id", kind="stable", ignore_index=True)
+    # lojas sem pedido entregue ficam no índice com 0 linhas, como em listar_vendedores sem snapshot
+    quantidades = por_vendedor["seller_id"].value_counts(sort=False)
+    inicios = quantidades.cumsum() - quantidades
+    presentes = set(base["seller_id"].dropna().unique())
+    indice = {
+        vendedor: [int(inicio), int(quantidade)]
+        for vendedor, inicio, quantidade in zip(quantidades.index, inicios, quantidades)
+        if vendedor in presentes
+    }
+    escrever_snapshot("vendedores", por_vendedor, marca, pasta, {b"indice_vendedores": json.dumps(indice).encode()})
+
+
+def ler_snapshot(nome, pasta=CAMINHO_SNAPSHOT):
+    # (marca, tabela) com a tabela mapeada do arquivo, ou None se o snapshot não existe
+    try:
+        tabela = pa.ipc.open_file(pa.memory_map(_caminho_snapshot(nome, pasta))).read_all()
+    except (OSError, ValueError):
+        return None
+    return json.loads(tabela.schema.metadata[b"marca_csv"]), tabela
+
+
+def _snapshot_atual(nome, caminho_csv, pasta=CAMINHO_SNAPSHOT):
+    lido = ler_snapshot(nome, pasta)
+    if lido is None or not _mesma_versao(lido[0], _assinatura_csv(caminho_csv)):
+        return None
+    return lido
+
+
+def _para_pandas(tabela):
+    # split_blocks: cada coluna num bloco próprio, então colunas sem nulos apontam direto para o arquivo mapeado
+    return tabela.to_pandas(split_blocks=True)
+
+
+def derivado_do_snapshot(nome, base, caminho_csv=CAMINHO_CSV, pasta=CAMINHO_SNAPSHOT):
+    # tabela derivada da base (ex.: pedidos, cubo) gravada no snapshot, se ele veio desta mesma
+    # versão da base; None caso contrário
+    marca = marca_da_base(base, caminho_csv)
+    lido = ler_snapshot(nome, pasta) if marca is not None else None
+    if lido is None or lido[0] != marca:
+        return None
+    return _para_pandas(lido[1])
+
+
+def marca_da_base(base, caminho_csv=CAMINHO_CSV):
+    # versão do CSV de onde veio `base`, se ela é a base compartilhada atual
+    em_cache = _cache.get(caminho_csv)
+    return em_cache[0] if em_cache is not None and em_cache[1] is base else None
+
+
+def salvar_parquet(df, caminho_parquet, marca):
+    _escrever_tabela(_com_marca(pa.Table.from_pandas(df, preserve_index=False), marca), caminho_parquet)
+    escrever_particao_vendedores(df, _caminho_vendedores(caminho_parquet), marca)
+    # as linhas dos anexos já estão no Parquet principal
+    pasta = _pasta_anexos(caminho_parquet)
+    for nome in os.listdir(pasta) if os.path.isdir(pasta) else []:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(pasta, nome))
+
+
+def converter_csv(caminho_csv=CAMINHO_CSV, caminho_parquet=CAMINHO_PARQUET):
+    assinatura = _assinatura_csv(caminho_csv)
+    df = ler_csv(caminho_csv, assinatura["tamanho"])
+    marca = _marca_csv(caminho_csv, assinatura)
+    salvar_parquet(df, caminho_parquet, marca)
+    return df, marca
+
+
+def _ler_anexos(caminho_parquet, marca):
+    # segue a cadeia de anexos a partir de `marca`: (linhas anexadas numa tabela só, ou None, e a
+    # marca em que a cadeia termina). Cada anexo traz a própria marca, então é lido de forma consistente
+    # mesmo que outro processo o regrave no meio do caminho.
+    novas = None
+    while True:
+        try:
+            tabela = pq.read_table(_caminho_anexo(caminho_parquet, marca))
+        except (OSError, ValueError):
+            return novas, marca
+        proxima = _marca_do_esquema(tabela.schema)
+        if proxima is None:
+            return novas, marca
+        parte = tabela.to_pandas()
+        novas = parte if novas is None else anexar_linhas(novas, parte)[0]
+        marca = proxima
+
+
+def _fim_em_disco(caminho_parquet):
+    # marca em que termina a cadeia Parquet principal + anexos, lendo só os metadados
+    marca = _ler_marca(caminho_parquet)
+    while marca is not None:
+        proxima = _ler_marca(_caminho_anexo(caminho_parquet, marca))
+        if proxima is None:
+            return marca
+        marca = proxima
+    return None
+
+
+def _anexar_do_csv(caminho_csv, caminho_parquet, df, marca, assinatura):
+    # (marca nova, base com as linhas novas, linhas novas): lê só o trecho que o CSV ganhou depois
+    # de `marca` e grava esse trecho como anexo, se o disco termina em `marca`. Um trecho que continua
+    # um pedido da base muda o rateio de linhas antigas: aí o Parquet inteiro é regravado.
+    trecho = ler_trecho_csv(caminho_csv, marca["tamanho"], assinatura["tamanho"])
+    juntas, novas = anexar_linhas(df, trecho)
+    nova_marca = _marca_csv(caminho_csv, assinatura)
+    if len(df) and len(novas) and novas["pedido"].min() <= df["pedido"].max():
+        salvar_parquet(juntas, caminho_parquet, nova_marca)
+    elif _fim_em_disco(caminho_parquet) == marca:
+        os.makedirs(_pasta_anexos(caminho_parquet), exist_ok=True)
+        tabela = _com_marca(pa.Table.from_pandas(trecho, preserve_index=False), nova_marca)
+        _escrever_tabela(tabela, _caminho_anexo(caminho_parquet, marca))
+    return nova_marca, juntas, novas
+
+
+def _carregar_do_disco(caminho_csv, caminho_parquet, assinatura):
+    # (marca, base): o Parquet principal mais os anexos; se o CSV ainda cresceu depois deles, só o
+    # trecho novo é lido. Sem um Parquet aproveitável, converte o CSV inteiro.
+    try:
+        tabela = pq.read_table(caminho_parquet)
+    except (OSError, ValueError):
+        tabela = None
+    # a marca vem do mesmo arquivo lido: um Parquet regravado no meio da leitura não se mistura com outro
+    marca = _marca_do_esquema(tabela.schema) if tabela is not None else None
+    if marca is not None:
+        df = tabela.to_pandas()
+        del tabela
+        novas, marca = _ler_anexos(caminho_parquet, marca)
+        if novas is not None:
+            df = anexar_linhas(df, novas)[0]
+        if _mesma_versao(marca, assinatura):
+            return marca, df
+        if _foi_anexado(caminho_csv, marca, assinatura):
+            return _anexar_do_csv(caminho_csv, caminho_parquet, df, marca, assinatura)[:2]
+    df, marca = converter_csv(caminho_csv, caminho_parquet)
+    return marca, df
+
+
+def compactar_parquet(caminho_csv=CAMINHO_CSV, caminho_parquet=CAMINHO_PARQUET):
+    # regrava o Parquet principal e a cópia por vendedor já com os anexos (ex.: depois da carga diária)
+    marca, df = _carregar_do_disco(caminho_csv, caminho_parquet, _assinatura_csv(caminho_csv))
+    if _ler_marca(caminho_parquet) != marca or _ler_marca(_caminho_vendedores(caminho_parquet)) != marca:
+        salvar_parquet(df, caminho_parquet, marca)
+    return df, marca
+
+
+def versao_dados(caminho_csv=CAMINHO_CSV):
+    # identifica a versão atual do CSV; serve de chave para caches externos (ex.: st.cache_data)
+    return tuple(sorted(_assinatura_csv(caminho_csv).items()))
+
+
+def carregar_base(caminho_csv=CAMINHO_CSV, caminho_parquet=CAMINHO_PARQUET):
+    # Uma cópia por processo, compartilhada entre páginas e sessões. Não modifique o DataFrame retornado.
+    assinatura = _assinatura_csv(caminho_csv)
+    with _lock:
+        em_cache = _cache.get(caminho_csv)
+        if em_cache is not None and _mesma_versao(em_cache[0], assinatura):
+            return em_cache[1]
+        anterior = novas = None
+        if em_cache is not None and _foi_anexado(caminho_csv, em_cache[0], assinatura):
+            # o CSV só cresceu: lê o trecho novo e anexa à base que já está em memória
+            anterior = em_cache[1]
+            marca, df, novas = _anexar_do_csv(caminho_csv, caminho_parquet, anterior, em_cache[0], assinatura)
+        else:
+            snapshot = _snapshot_atual("base", caminho_csv)
+            if snapshot is not None:
+                # gerado por snapshot_loja.py para esta versão do CSV: só mapeia o arquivo
+                marca, df = snapshot[0], _para_pandas(snapshot[1])
+            else:
+                marca, df = _carregar_do_disco(caminho_csv, caminho_parquet, assinatura)
+        _cache[caminho_csv] = (marca, df)
+        # guardado para os agregados (ex.: cubo_loja) se atualizarem só com as linhas novas
+        _incrementos[caminho_csv] = (df, weakref.ref(anterior), novas) if novas is not None else None
+        return df
+
+
+def incremento_da_base(df, caminho_csv=CAMINHO_CSV):
+    # (base anterior, linhas novas) se `df` é a base atual e veio de anexar linhas à anterior;
+    # None se foi lida do zero ou se a base anterior já não existe em memória
+    registro = _incrementos.get(caminho_csv)
+    if registro is None or registro[0] is not df:
+        return None
+    anterior = registro[1]()
+    return None if anterior is None else (anterior, registro[2])
+
+
+def _ler_particao(caminho_csv, caminho_parquet, assinatura):
+    # (marca, índice loja -> [início, quantidade], linhas dos anexos depois da marca) se a cópia por
+    # vendedor mais os anexos chegam à versão atual do CSV; None caso contrário
+    try:
+        esquema = pq.read_schema(_caminho_vendedores(caminho_parquet))
+    except (OSError, ValueError):
+        return None
+    marca = _marca_do_esquema(esquema)
+    if marca is None:
+        return None
+    anexos, fim = _ler_anexos(caminho_parquet, marca)
+    if not _mesma_versao(fim, assinatura):
+        return None
+    return marca, json.loads(esquema.metadata[b"indice_vendedores"]), anexos
+
+
+def _estado_vendedores(caminho_csv, caminho_parquet):
+    assinatura = _assinatura_csv(caminho_csv)
+    with _lock:
+        em_cache = _cache_indice.get(caminho_csv)
+        if em_cache is not None and em_cache[0] == assinatura:
+            return em_cache[1]
+        estado = _ler_particao(caminho_csv, caminho_parquet, assinatura)
+        if estado is None:
+            # o disco ainda não tem as linhas novas do CSV: a carga da base grava o anexo (ou converte)
+            marca, df = _carregar_do_disco(caminho_csv, caminho_parquet, assinatura)
+            estado = _ler_particao(caminho_csv, caminho_parquet, assinatura)
+            if estado is None:
+                # a cópia por vendedor ficou de fora da cadeia (ex.: conversão interrompida antes de gravá-la)
+                indice = escrever_particao_vendedores(df, _caminho_vendedores(caminho_parquet), marca)
+                estado = (marca, indice, None)
+        _cache_indice[caminho_csv] = (assinatura, estado)
+        return estado
+
+
+def _indice_snapshot_vendedores(snapshot, caminho_csv):
+    marca, tabela = snapshot
+    with _lock:
+        em_cache = _cache_indice.get(("snapshot", caminho_csv))
+        if em_cache is not None and em_cache[0] == marca:
+            return em_cache[1]
+        indice = json.loads(tabela.schema.metadata[b"indice_vendedores"])
+        _cache_indice[("snapshot", caminho_csv)] = (marca, indice)
+        return indice
+
+
+def listar_vendedores(caminho_csv=CAMINHO_CSV, caminho_parquet=CAMINHO_PARQUET):
+    snapshot = _snapshot_atual("vendedores", caminho_csv)
+    if snapshot is not None:
+        return sorted(_indice_snapshot_vendedores(snapshot, caminho_csv))
+    _, indice, anexos = _estado_vendedores(caminho_csv, caminho_parquet)
+    vendedores = set(indice)
+    if anexos is not None:
+        vendedores.update(anexos["seller_id"].dropna().unique())
+    return sorted(vendedores)
+
+
+def carregar_vendedor(seller_id, caminho_csv=CAMINHO_CSV, caminho_parquet=CAMINHO_PARQUET):
+    # lê do disco apenas os grupos de linhas que contêm a loja, já ordenados por data de compra,
+    # mais as linhas dela nos anexos
+    for _ in range(2):
+        marca, indice, anexos = _estado_vendedores(caminho_csv, caminho_parquet)
+        arquivo = pq.ParquetFile(_caminho_vendedores(caminho_parquet))
+        if _marca_do_esquema(arquivo.schema_arrow) == marca:
+            break
+        # a cópia por vendedor foi regravada depois que o índice entrou no cache
+        with _lock:
+            _cache_indice.pop(caminho_csv, None)
+    df = _linhas_do_vendedor(arquivo, indice.get(seller_id))
+    if anexos is not None:
+        extras = anexos[(anexos["seller_id"] == seller_id).to_numpy()]
+        if len(extras):
+            df = anexar_linhas(df, extras.reset_index(drop=True))[0]
+    return df
+
+
+def _linhas_do_vendedor(arquivo, posicao):
+    if posicao is None:
+        return arquivo.schema_arrow.empty_table().to_pandas()
+    inicio, quantidade = posicao
+    grupos, primeira_linha, linha = [], None, 0
+    for i in range(arquivo.num_row_groups):
+        linhas_grupo = arquivo.metadata.row_group(i).num_rows
+        if linha < inicio + quantidade and linha + linhas_grupo > inicio:
+            if primeira_linha is None:
+                primeira_linha = linha
+            grupos.append(i)
+        linha += linhas_grupo
+    tabela = arquivo.read_row_groups(grupos).slice(inicio - primeira_linha, quantidade)
+    return tabela.to_pandas()
+
+
+def carregar_vendedor_preparado(seller_id, caminho_csv=CAMINHO_CSV, caminho_parquet=CAMINHO_PARQUET):
+    # o mesmo que preparar_vendedor(carregar_vendedor(...)); com snapshot, só um recorte do arquivo mapeado
+    snapshot = _snapshot_atual("vendedores", caminho_csv)
+    if snapshot is None:
+        return preparar_vendedor(carregar_vendedor(seller_id, caminho_csv, caminho_parquet))
+    inicio, quantidade = _indice_snapshot_vendedores(snapshot, caminho_csv).get(seller_id, (0, 0))
+    df = _para_pandas(snapshot[1].slice(inicio, quantidade))
+    # ano_mes foi calculado com todas as lojas; fica só com os meses desta, como em preparar_vendedor
+    df["ano_mes"] = df["ano_mes"].cat.remove_unused_categories()
+    return df
+
+
+def carregar_linhas_lojas(caminho_csv=CAMINHO_CSV):
+    # as linhas de todas as lojas como o portal as vê (preparar_vendedor), em sequência por loja;
+    # com snapshot, mapeadas do arquivo
+    snapshot = _snapshot_atual("vendedores", caminho_csv)
+    if snapshot is not None:
+        return _para_pandas(snapshot[1])
+    return preparar_vendedor(carregar_base(caminho_csv))
+
+
+if __name__ == "__main__":
+    df, _ = compactar_parquet()
+    print(f"{CAMINHO_PARQUET}: {len(df):,} linhas")
@@ -0,0 +1,185 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# --- BASE SINTÉTICA NO FORMATO DA OLIST ---
+# Gera um dataset_olist_final_limpo.csv de qualquer tamanho (100 mil a 50 milhões de linhas) com as
+# mesmas colunas e a mesma forma da base real: uma linha por item x pagamento do pedido, valor do
+# pagamento repetido nos itens, pedidos concentrados em SP/RJ/MG, lojas e cidades com cauda longa
+# e volume crescendo ao longo do tempo. Os pedidos são gerados em blocos, com memória constante.
+
+COLUNAS = [
+    "order_id", "customer_id", "seller_id", "customer_state", "customer_city", "price", "freight_value",
+    "payment_value", "payment_type", "review_score", "product_category_name_english",
+    "order_purchase_timestamp", "order_delivered_customer_date", "order_estimated_delivery_date",
+]
+
+# participação aproximada de cada estado nos pedidos e prazo médio de entrega (dias)
+ESTADOS = {
+    "SP": (0.420, 8), "RJ": (0.130, 15), "MG": (0.117, 12), "RS": (0.055, 15), "PR": (0.051, 12),
+    "SC": (0.036, 15), "BA": (0.034, 19), "DF": (0.021, 13), "ES": (0.020, 15), "GO": (0.020, 15),
+    "PE": (0.017, 18), "CE": (0.013, 21), "PA": (0.010, 23), "MT": (0.009, 18), "MA": (0.007, 21),
+    "MS": (0.007, 15), "PB": (0.005, 20), "PI": (0.005, 19), "RN": (0.005, 19), "AL": (0.004, 24),
+    "SE": (0.003, 21), "TO": (0.003, 17), "RO": (0.003, 19), "AM": (0.002, 26), "AC": (0.001, 21),
+    "AP": (0.001, 27), "RR": (0.001, 29),
+}
+
+# itens de cada categoria na base real (aproximado); a cauda de categorias raras fica de fora
+CATEGORIAS = {
+    "bed_bath_table": 11115, "health_beauty": 9670, "sports_leisure": 8641, "furniture_decor": 8334,
+    "computers_accessories": 7827, "housewares": 6964, "watches_gifts": 5991, "telephony": 4545,
+    "garden_tools": 4347, "auto": 4235, "toys": 4117, "cool_stuff": 3796, "perfumery": 3419, "baby": 3065,
+    "electronics": 2767, "stationery": 2517, "fashion_bags_accessories": 2031, "pet_shop": 1947,
+    "office_furniture": 1691, "consoles_games": 1137, "luggage_accessories": 1092,
+    "construction_tools_construction": 929, "home_appliances": 771, "musical_instruments": 680,
+    "small_appliances": 679, "home_construction": 604, "books_general_interest": 553, "food": 510,
+    "furniture_living_room": 503, "home_confort": 434, "drinks": 379, "audio": 364, "market_place": 311,
+    "air_conditioning": 297,
+}
+
+# expoentes das caudas longas: com ~3 mil lojas (tamanho da base real) a maior loja fica com ~2%
+# dos pedidos; a maior cidade de cada estado, com ~40% dos pedidos dele
+EXPOENTE_LOJAS = 0.65
+EXPOENTE_CIDADES = 1.6
+
+PAGAMENTOS = {"credit_card": 0.74, "boleto": 0.19, "voucher": 0.055, "debit_card": 0.015}
+NOTAS = {5: 0.57, 4: 0.19, 1: 0.11, 3: 0.08, 2: 0.03, np.nan: 0.02}
+
+INICIO = pd.Timestamp("2016-09-04")
+FIM = pd.Timestamp("2018-10-17")
+
+PEDIDOS_POR_BLOCO = 500_000
+LINHAS_POR_PEDIDO = 1.2
+
+
+def _ids(numeros, prefixo=0):
+    # 32 caracteres hexadecimais, como os ids da Olist; o embaralhamento evita ids sequenciais
+    embaralhado = (numeros.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) ^ np.uint64(prefixo)
+    return np.array([f"{a:016x}{b:016x}" for a, b in zip(embaralhado, numeros)], dtype=object)
+
+
+def _escolher(rng, opcoes, pesos, tamanho):
+    pesos = np.asarray(pesos, dtype=float)
+    return np.asarray(opcoes, dtype=object)[rng.choice(len(pesos), size=tamanho, p=pesos / pesos.sum())]
+
+
+def _zipf_truncado(rng, expoente, limites, tamanho):
+    # posições 0..limite-1 com P(k) proporcional a (k + 1) ** -expoente; `limites` pode variar por
+    # linha. Cortar um zipf comum no limite (np.minimum) empilharia a cauda inteira na última posição.
+    limites = np.broadcast_to(limites, tamanho)
+    sorteio = rng.random(tamanho)
+    posicoes = np.empty(tamanho, dtype=np.int64)
+    for limite in np.unique(limites):
+        acumulado = np.cumsum(np.arange(1, limite + 1, dtype=float) ** -expoente)
+        linhas = limites == limite
+        posicoes[linhas] = np.minimum(np.searchsorted(acumulado / acumulado[-1], sorteio[linhas], side="right"), limite - 1)
+    return posicoes
+
+
+def _bloco(rng, primeiro_pedido, pedidos, vendedores, cidades_por_estado):
+    numeros = np.arange(primeiro_pedido, primeiro_pedido + pedidos)
+    itens = np.minimum(rng.geometric(0.87, pedidos), 21)
+    pagamentos = np.where(rng.random(pedidos) < 0.03, rng.integers(2, 4, pedidos), 1)
+
+    siglas = list(ESTADOS)
+    estado = rng.choice(len(siglas), size=pedidos, p=np.array([p for p, _ in ESTADOS.values()]) / sum(p for p, _ in ESTADOS.values()))
+    prazo = np.array([d for _, d in ESTADOS.values()])[estado]
+    # cidades com cauda longa dentro de cada estado: poucas concentram a maior parte dos pedidos
+    n_cidades = cidades_por_estado[estado]
+    cidade = _zipf_truncado(rng, EXPOENTE_CIDADES, n_cidades, pedidos)
+    loja = _zipf_truncado(rng, EXPOENTE_LOJAS, vendedores, pedidos)
+
+    # volume crescendo com o tempo: densidade linear entre INICIO e FIM
+    segundos = int((FIM - INICIO).total_seconds())
+    compra = INICIO + pd.to_timedelta((np.sqrt(rng.random(pedidos)) * segundos).astype(np.int64), unit="s")
+    entrega = compra + pd.to_timedelta(np.round(rng.gamma(2.5, prazo / 2.5) * 86400), unit="s")
+    entrega = entrega.where(rng.random(pedidos) > 0.03)
+    estimada = compra.normalize() + pd.to_timedelta(np.round(prazo * 1.6 + rng.integers(0, 15, pedidos)), unit="D")
+    nota = _escolher(rng, list(NOTAS), list(NOTAS.values()), pedidos).astype(float)
+    tipo_pagamento = _escolher(rng, list(PAGAMENTOS), list(PAGAMENTOS.values()), pedidos)
+
+    # itens: preço, frete, categoria e loja (às vezes outra loja no mesmo pedido)
+    total_itens = int(itens.sum())
+    inicio_itens = np.cumsum(itens) - itens
+    preco = np.round(rng.lognormal(4.4, 0.9, total_itens), 2)
+    frete = np.round(rng.gamma(2.0, 10.0, total_itens) * np.repeat(prazo / 12, itens), 2)
+    categoria = _escolher(rng, list(CATEGORIAS), list(CATEGORIAS.values()), total_itens)
+    categoria[rng.random(total_itens) < 0.015] = None
+    loja_item = np.where(rng.random(total_itens) < 0.05, rng.integers(0, vendedores, total_itens), np.repeat(loja, itens))
+    total_pedido = np.add.reduceat(preco + frete, inicio_itens)
+
+    # pagamentos: o primeiro no tipo do pedido, os demais em voucher, cada um com uma fração do total
+    inicio_pagamentos = np.cumsum(pagamentos) - pagamentos
+    pedido_do_pagamento = np.repeat(np.arange(pedidos), pagamentos)
+    fracao = rng.uniform(0.2, 1.0, len(pedido_do_pagamento))
+    fracao /= np.bincount(pedido_do_pagamento, weights=fracao)[pedido_do_pagamento]
+    valores = np.round(total_pedido[pedido_do_pagamento] * fracao, 2)
+    tipos = tipo_pagamento[pedido_do_pagamento]
+    tipos[np.arange(len(tipos)) != inicio_pagamentos[pedido_do_pagamento]] = "voucher"
+
+    # linhas: item x pagamento; o valor de cada pagamento se repete em todos os itens
+    linhas = itens * pagamentos
+    pedido_da_linha = np.repeat(np.arange(pedidos), linhas)
+    posicao = np.arange(int(linhas.sum())) - np.repeat(np.cumsum(linhas) - linhas, linhas)
+    item_da_linha = inicio_itens[pedido_da_linha] + posicao // pagamentos[pedido_da_linha]
+    pagamento_da_linha = inicio_pagamentos[pedido_da_linha] + posicao % pagamentos[pedido_da_linha]
+
+    ids_pedido = _ids(numeros)
+    ids_cliente = _ids(numeros, prefixo=0x5A5A)
+    ids_loja = _ids(np.arange(vendedores, dtype=np.int64), prefixo=0xA5A5)
+    nomes_cidade = np.char.add(np.char.add(np.array([s.lower() for s in siglas])[estado], "_cidade_"), cidade.astype(str))
+
+    return pd.DataFrame({
+        "order_id": ids_pedido[pedido_da_linha],
+        "customer_id": ids_cliente[pedido_da_linha],
+        "seller_id": ids_loja[loja_item[item_da_linha]],
+        "customer_state": np.array(siglas)[estado][pedido_da_linha],
+        "customer_city": nomes_cidade[pedido_da_linha],
+        "price": preco[item_da_linha],
+        "freight_value": frete[item_da_linha],
+        "payment_value": valores[pagamento_da_linha],
+        "payment_type": tipos[pagamento_da_linha],
+        "review_score": nota[pedido_da_linha],
+        "product_category_name_english": categoria[item_da_linha],
+        "order_purchase_timestamp": compra[pedido_da_linha].astype("datetime64[s]"),
+        "order_delivered_customer_date": entrega[pedido_da_linha].astype("datetime64[s]"),
+        "order_estimated_delivery_date": estimada[pedido_da_linha].astype("datetime64[s]"),
+    }, columns=COLUNAS)
+
+
+def gerar_csv(caminho, linhas, semente=0, vendedores=None):
+    # escreve ~`linhas` linhas (o último pedido não é cortado ao meio) e devolve quantas foram escritas
+    rng = np.random.default_rng(semente)
+    vendedores = vendedores or max(100, linhas // 36)  # ~3 mil lojas para os ~112 mil itens da base real
+    cidades_por_estado = np.array([max(10, int(p * linhas / 25)) for p, _ in ESTADOS.values()])
+    escritas, primeiro_pedido = 0, 0
+    with open(caminho, "wb") as f:
+        while escritas < linhas:
+            pedidos = min(PEDIDOS_POR_BLOCO, int((linhas - escritas) / LINHAS_POR_PEDIDO) + 100)
+            bloco = _bloco(rng, primeiro_pedido, pedidos, vendedores, cidades_por_estado)
+            primeiro_pedido += pedidos
+            if escritas + len(bloco) > linhas:
+                fim_pedido = bloco["order_id"].ne(bloco["order_id"].shift(-1)).to_numpy()
+                cabe = np.flatnonzero(fim_pedido[: linhas - escritas])
+                bloco = bloco.iloc[: cabe[-1] + 1 if len(cabe) else 0]
+            # o escritor do Arrow é ~10x mais rápido que DataFrame.to_csv e domina o tempo de geração
+            tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+            pacsv.write_csv(tabela, f, pacsv.WriteOptions(include_header=escritas == 0, quoting_style="needed"))
+            escritas += len(bloco)
+            if bloco.empty:
+                break
+    return escritas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera uma base sintética no formato de dataset_olist_final_limpo.csv.")
+    parser.add_argument("linhas", type=int, help="quantidade aproximada de linhas (ex.: 100000, 50000000)")
+    parser.add_argument("-o", "--saida", default="dataset_olist_final_limpo.csv")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--vendedores", type=int, default=None, help="quantidade de lojas (padrão: proporcional às linhas)")
+    args = parser.parse_args()
+    escritas = gerar_csv(args.saida, args.linhas, semente=args.semente, vendedores=args.vendedores)
+    print(f"{args.saida}: {escritas:,} linhas")
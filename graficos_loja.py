@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+# --- AGREGAÇÃO DOS GRÁFICOS NO SERVIDOR ---
+# Histogramas e dispersões são resumidos aqui com NumPy; o navegador recebe só as barras
+# (ou os pontos já agregados), e o tamanho da figura não cresce com o número de pedidos.
+
+# acima disso a dispersão é agregada numa grade de GRADE_DISPERSAO x GRADE_DISPERSAO células
+LIMITE_PONTOS_DISPERSAO = 5_000
+GRADE_DISPERSAO = 60
+
+
+def histograma(valores, nbins=30):
+    # bordas inteiras: valores como tempo_entrega (dias) não caem entre duas barras
+    valores = pd.Series(valores).dropna().to_numpy()
+    if len(valores) == 0:
+        return pd.DataFrame({"inicio": [], "fim": [], "centro": [], "contagem": []})
+    minimo, maximo = np.floor(valores.min()), np.floor(valores.max())
+    largura = max(1.0, np.ceil((maximo - minimo + 1) / nbins))
+    bordas = np.arange(minimo, maximo + largura + 1, largura)
+    contagens, bordas = np.histogram(valores, bins=bordas)
+    return pd.DataFrame({"inicio": bordas[:-1], "fim": bordas[1:], "centro": (bordas[:-1] + bordas[1:]) / 2, "contagem": contagens})
+
+
+def agregar_dispersao(df, x, y, tamanho=None, cor=None, limite=LIMITE_PONTOS_DISPERSAO, grade=GRADE_DISPERSAO):
+    # até `limite` linhas devolve df como está; acima, junta os pontos de cada célula da grade
+    # (e de cada cor) num ponto na média de x/y, com `pontos` = quantos foram juntados
+    if len(df) <= limite:
+        return df
+    dados = df.dropna(subset=[x, y])
+    celulas = []
+    for coluna in (x, y):
+        valores = dados[coluna].to_numpy(dtype=float)
+        bordas = np.linspace(valores.min(), valores.max(), grade + 1)
+        celulas.append(np.clip(np.searchsorted(bordas, valores, side="right") - 1, 0, grade - 1))
+    chaves = [pd.Series(celulas[0], index=dados.index, name="_cx"), pd.Series(celulas[1], index=dados.index, name="_cy")]
+    if cor is not None:
+        chaves.insert(0, dados[cor])
+    agregacoes = {x: (x, "mean"), y: (y, "mean"), "pontos": (x, "size")}
+    if tamanho is not None:
+        agregacoes[tamanho] = (tamanho, "sum")
+    agregado = dados.groupby(chaves, observed=True).agg(**agregacoes).reset_index()
+    return agregado.drop(columns=["_cx", "_cy"])
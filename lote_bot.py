@@ -0,0 +1,258 @@
+import argparse
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from bot_loja import interpretar, formatar_resposta, calcular_valores, cubo_da_consulta, mascara_linhas, responder
+from comparacao_loja import janelas_comparacao
+from cubo_loja import DIAS_ORDEM, METRICAS, carregar_cubo, carregar_cubo_lojas, construir_cubo, kpis_de_totais, rotular_intervalos
+from dados_loja import carregar_base, carregar_linhas_lojas, listar_vendedores
+from regioes_loja import regiao_dos_estados
+
+# --- PERGUNTAS DO BOT EM LOTE ---
+# Avalia uma lista de (pergunta, período, loja) sem filtrar o cubo pergunta a pergunta:
+# - KPIs somáveis: o cubo é ordenado por (loja, dia) e acumulado uma vez; a soma de qualquer
+#   período sai de duas buscas binárias nas somas acumuladas.
+# - Rankings (categoria, dia da semana, estado): as linhas do período de cada pergunta são
+#   rotuladas com o número da consulta e um único groupby por métrica resolve o lote inteiro.
+# Os textos saem de bot_loja.formatar_resposta, idênticos aos do chat.
+
+# dias desde 1970 cabem folgados nesse espaço; a chave de busca é loja * ESPACO_DIAS + dia
+ESPACO_DIAS = 1_000_000
+
+# métricas que são um número inteiro de centavos em toda linha do cubo (ver dados_loja._ratear_centavos)
+METRICAS_CENTAVOS = {"faturamento"}
+
+COLUNAS_SAIDA = [
+    "pergunta", "seller_id", "inicio", "fim", "intencao", "resposta",
+    "faturamento", "pedidos", "ticket_medio", "nota_media", "tempo_medio_entrega", "frete_medio",
+    "atrasados", "taxa_no_prazo", "produto_campeao", "melhor_dia", "estado_atencao", "tempo_atencao",
+]
+
+
+def _dias(datas):
+    return np.array(datas, dtype="datetime64[D]").astype(np.int64)
+
+
+def _ordenar_cubo(cubo, por_loja):
+    dias = cubo["dia"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    if por_loja:
+        codigos, lojas = pd.factorize(cubo["seller_id"], sort=True)
+    else:
+        codigos, lojas = np.zeros(len(cubo), dtype=np.int64), pd.Index([""])
+    chaves = codigos.astype(np.int64) * ESPACO_DIAS + dias
+    ordem = np.argsort(chaves, kind="stable")
+    return cubo.iloc[ordem].reset_index(drop=True), chaves[ordem], pd.Index(lojas)
+
+
+def _intervalos(chaves, codigos, inicios, fins):
+    # lojas ausentes têm código -1 e caem num intervalo vazio
+    base = codigos.astype(np.int64) * ESPACO_DIAS
+    return np.searchsorted(chaves, base + _dias(inicios), side="left"), np.searchsorted(chaves, base + _dias(fins), side="right")
+
+
+def _vencedor_por_consulta(serie):
+    # serie indexada por (consulta, valor): devolve {consulta: (valor vencedor, métrica)}
+    if serie.empty:
+        return {}
+    vencedores = serie.groupby(level=0).idxmax()
+    return {consulta: (chave[1], metrica) for consulta, chave, metrica in zip(vencedores.index, vencedores, serie.loc[vencedores.to_list()])}
+
+
+def _somas_acumuladas(ordenado):
+    # o faturamento vira centavos inteiros: a diferença de duas somas acumuladas fica exata. As
+    # demais métricas (frete, pesos de itens e pedidos, contagens) são somadas em float64 como estão
+    # e só arredondadas no fim, na formatação da resposta.
+    colunas = []
+    for metrica in METRICAS:
+        valores = ordenado[metrica].to_numpy(dtype=float)
+        colunas.append(np.round(valores * 100) if metrica in METRICAS_CENTAVOS else valores)
+    acumulado = np.cumsum(np.column_stack(colunas), axis=0)
+    return np.vstack([np.zeros(len(METRICAS)), acumulado])
+
+
+def _totais(somas):
+    totais = dict(zip(METRICAS, somas))
+    for metrica in METRICAS_CENTAVOS:
+        totais[metrica] = totais[metrica] / 100
+    return totais
+
+
+def _avaliar_grupo(cubo, consultas, por_loja):
+    # consultas com os mesmos filtros de estado/categoria/pagamento, todas por loja ou todas sem loja
+    ordenado, chaves, lojas = _ordenar_cubo(cubo, por_loja)
+    codigos = lojas.get_indexer([c.vendedores[0] if por_loja else "" for c in consultas])
+    inicios, fins = _intervalos(chaves, codigos, [c.inicio for c in consultas], [c.fim for c in consultas])
+    janelas = [janelas_comparacao(c.inicio, c.fim) for c in consultas]
+    somas_janelas = {}
+
+    acumulado = _somas_acumuladas(ordenado)
+    somas = acumulado[fins] - acumulado[inicios]
+    for janela in ("anterior", "ano_anterior"):
+        inicios_janela, fins_janela = _intervalos(chaves, codigos, [j[janela][0] for j in janelas], [j[janela][1] for j in janelas])
+        somas_janelas[janela] = acumulado[fins_janela] - acumulado[inicios_janela]
+
+    intencoes = {c.intencao for c in consultas}
+    campeoes, dias, atencao = {}, {}, {}
+    if intencoes & {"resumo", "produto_mais_vendido", "melhor_dia_semana", "entrega_mais_demorada"}:
+        consulta, posicoes = rotular_intervalos(inicios, fins)
+        rotulado = ordenado.iloc[posicoes].assign(consulta=consulta)
+        if intencoes & {"resumo", "produto_mais_vendido"}:
+            itens = rotulado.groupby(["consulta", "product_category_name_english"], observed=True)["itens"].sum()
+            campeoes = {k: categoria for k, (categoria, _) in _vencedor_por_consulta(itens).items()}
+        if "melhor_dia_semana" in intencoes:
+            faturamento_dia = rotulado.groupby(["consulta", rotulado["dia"].dt.dayofweek])["faturamento"].sum()
+            dias = {k: dia for k, (dia, _) in _vencedor_por_consulta(faturamento_dia).items()}
+        if intencoes & {"resumo", "entrega_mais_demorada"}:
+            tempos = rotulado.groupby(["consulta", "customer_state"], observed=True)[["soma_tempo_entrega", "qtd_tempo_entrega"]].sum()
+            tempos = tempos[tempos["qtd_tempo_entrega"] > 0]
+            medias = tempos["soma_tempo_entrega"] / tempos["qtd_tempo_entrega"]
+            atencao = _vencedor_por_consulta(medias)
+
+    resultados = []
+    for k, c in enumerate(consultas):
+        valores = kpis_de_totais(_totais(somas[k]))
+        valores['vazio'] = somas[k][METRICAS.index("itens")] == 0
+        valores['produto_campeao'] = campeoes.get(k)
+        valores['melhor_dia'] = DIAS_ORDEM[dias[k]] if k in dias else None
+        valores['estado_atencao'], valores['tempo_atencao'] = atencao.get(k, (None, None))
+        for janela, somas_janela in somas_janelas.items():
+            anteriores = kpis_de_totais(_totais(somas_janela[k]))
+            valores[f'faturamento_{janela}'], valores[f'pedidos_{janela}'] = anteriores['faturamento'], anteriores['pedidos']
+        resultados.append(valores)
+    return resultados
+
+
+def avaliar_consultas(consultas):
+    valores = [None] * len(consultas)
+    grupos = {}
+    for k, c in enumerate(consultas):
+        if c.intencao is None:
+            valores[k] = {}
+        elif len(c.vendedores) > 1:
+            # fora das dimensões do lote: cai no caminho de uma consulta por vez
+            valores[k] = calcular_valores(c, cubo_da_consulta(c))
+        else:
+            grupos.setdefault((c.cidades, c.estados, c.regioes, c.categorias, c.pagamentos, bool(c.vendedores)), []).append(k)
+
+    cubos, linhas_lojas = {}, None
+    for (cidades, estados, regioes, categorias, pagamentos, por_loja), posicoes in grupos.items():
+        # como em bot_loja.cubo_da_consulta: por loja, as linhas do portal do vendedor; com cidade,
+        # categoria ou pagamento, um cubo só das linhas pedidas, para cada pedido do recorte contar
+        # uma vez. Cada cubo é montado uma vez por lote.
+        chave = (cidades, categorias, pagamentos, por_loja)
+        if chave not in cubos:
+            if not (cidades or categorias or pagamentos):
+                cubos[chave] = carregar_cubo_lojas() if por_loja else carregar_cubo()
+            else:
+                if por_loja and linhas_lojas is None:
+                    linhas_lojas = carregar_linhas_lojas()
+                linhas = linhas_lojas if por_loja else carregar_base()
+                cubos[chave] = construir_cubo(linhas[mascara_linhas(linhas, cidades, categorias, pagamentos)], por_loja=por_loja)
+        filtrado = cubos[chave]
+        if estados:
+            filtrado = filtrado[filtrado["customer_state"].isin(estados)]
+        if regioes:
+            filtrado = filtrado[regiao_dos_estados(filtrado["customer_state"]).isin(regioes).to_numpy()]
+        for k, v in zip(posicoes, _avaliar_grupo(filtrado, [consultas[k] for k in posicoes], por_loja)):
+            valores[k] = v
+    return valores
+
+
+def _interpretar_itens(itens):
+    cubo = carregar_cubo()
+    periodo_total = (cubo["dia"].min().date(), cubo["dia"].max().date())
+    interpretadas = {}
+    consultas, linhas = [], []
+    for pergunta, periodo, seller_id in itens:
+        inicio, fim = periodo or periodo_total
+        chave = (pergunta, inicio, fim)
+        if chave not in interpretadas:
+            interpretadas[chave] = interpretar(pergunta, inicio, fim)[0]
+        consulta = interpretadas[chave]
+        if seller_id and consulta.intencao is not None:
+            consulta = consulta._replace(vendedores=(seller_id,))
+        consultas.append(consulta)
+        linhas.append({"pergunta": pergunta, "seller_id": seller_id or "", "inicio": consulta.inicio, "fim": consulta.fim, "intencao": consulta.intencao})
+    return consultas, linhas
+
+
+def avaliar_lote(itens):
+    # itens: (pergunta, (inicio, fim), seller_id); seller_id vazio/None analisa todas as lojas
+    consultas, linhas = _interpretar_itens(itens)
+    for linha, consulta, valores in zip(linhas, consultas, avaliar_consultas(consultas)):
+        linha["resposta"] = formatar_resposta(consulta, valores).strip()
+        for coluna in COLUNAS_SAIDA:
+            if coluna not in linha:
+                linha[coluna] = valores.get(coluna)
+    return pd.DataFrame(linhas, columns=COLUNAS_SAIDA)
+
+
+def conferir_com_chat(itens, resultado=None):
+    # linhas do lote cuja resposta difere da do chat (bot_loja.responder) para a mesma consulta
+    consultas, _ = _interpretar_itens(itens)
+    resultado = avaliar_lote(itens) if resultado is None else resultado
+    chat = [responder(consulta).strip() for consulta in consultas]
+    return resultado.assign(resposta_chat=chat)[resultado["resposta"].to_numpy() != np.array(chat, dtype=object)]
+
+
+# --- LINHA DE COMANDO ---
+def _meses(inicio, fim):
+    return [(p.start_time.date(), p.end_time.date()) for p in pd.period_range(inicio, fim, freq="M")]
+
+
+def ler_perguntas(caminho):
+    if caminho.endswith(".csv"):
+        return pd.read_csv(caminho, dtype=str).fillna("")
+    if caminho.endswith(".json"):
+        return pd.read_json(caminho, dtype=str).fillna("")
+    with open(caminho, encoding="utf-8") as f:
+        return pd.DataFrame({"pergunta": [linha.strip() for linha in f if linha.strip()]})
+
+
+def montar_itens(perguntas, por_mes=False, por_loja=False):
+    if por_mes:
+        dias = carregar_cubo()["dia"]
+        periodos = _meses(dias.min(), dias.max())
+    vendedores = listar_vendedores() if por_loja else None
+    itens = []
+    for linha in perguntas.to_dict("records"):
+        if por_mes:
+            periodos_linha = periodos
+        elif linha.get("inicio") and linha.get("fim"):
+            periodos_linha = [(date.fromisoformat(linha["inicio"]), date.fromisoformat(linha["fim"]))]
+        else:
+            periodos_linha = [None]
+        vendedores_linha = vendedores or [linha.get("seller_id", "")]
+        itens.extend((linha["pergunta"], periodo, vendedor) for periodo in periodos_linha for vendedor in vendedores_linha)
+    return itens
+
+
+def salvar(resultado, caminho):
+    if os.path.splitext(caminho)[1] == ".json":
+        resultado.to_json(caminho, orient="records", force_ascii=False, date_format="iso", indent=2)
+    else:
+        resultado.to_csv(caminho, index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Responde perguntas do bot em lote, sem Streamlit.")
+    parser.add_argument("perguntas", help=".txt (uma pergunta por linha), .csv ou .json com a coluna 'pergunta' e, opcionalmente, 'inicio', 'fim' (AAAA-MM-DD) e 'seller_id'")
+    parser.add_argument("-o", "--saida", default="respostas_bot.csv", help="arquivo de saída .csv ou .json")
+    parser.add_argument("--por-mes", action="store_true", help="repete cada pergunta para todos os meses da base")
+    parser.add_argument("--por-loja", action="store_true", help="repete cada pergunta para todas as lojas")
+    parser.add_argument("--conferir", action="store_true", help="responde também pelo caminho do chat e lista as respostas diferentes")
+    args = parser.parse_args()
+
+    itens = montar_itens(ler_perguntas(args.perguntas), por_mes=args.por_mes, por_loja=args.por_loja)
+    resultado = avaliar_lote(itens)
+    salvar(resultado, args.saida)
+    print(f"{len(resultado):,} respostas em {args.saida}")
+    if args.conferir:
+        diferentes = conferir_com_chat(itens, resultado)
+        for linha in diferentes.to_dict("records"):
+            print(f"- {linha['pergunta']} ({linha['inicio']} a {linha['fim']}, loja {linha['seller_id'] or 'todas'})\n  lote: {linha['resposta']!r}\n  chat: {linha['resposta_chat']!r}")
+        print(f"{len(diferentes):,} respostas diferentes das do chat")
+        raise SystemExit(1 if len(diferentes) else 0)
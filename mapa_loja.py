@@ -0,0 +1,46 @@
+import json
+import os
+from functools import lru_cache
+
+import plotly.express as px
+
+# --- MAPA DE ESTADOS ---
+# A geometria dos estados fica num GeoJSON simplificado dentro do repositório (~7 mil vértices,
+# coordenadas com 3 casas) e é lida uma vez por processo. A figura leva a geometria embutida:
+# o navegador não busca nada na rede.
+
+# ao lado do módulo: as páginas (e o benchmark) podem rodar com outro diretório de trabalho
+CAMINHO_GEOJSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "brasil_estados.geojson")
+
+
+@lru_cache(maxsize=1)
+def carregar_geojson():
+    with open(CAMINHO_GEOJSON, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=8)
+def geojson_estados(estados=None):
+    # estados: tupla de siglas; recorta a geometria para a figura não carregar o país inteiro
+    geojson = carregar_geojson()
+    if estados is None:
+        return geojson
+    siglas = set(estados)
+    return {"type": "FeatureCollection", "features": [f for f in geojson["features"] if f["properties"]["sigla"] in siglas]}
+
+
+def mapa_estados(valores, titulo, rotulo, estados=None, escala="Oranges"):
+    # valores: Series indexada pela sigla do estado
+    tabela = valores.rename_axis("state_code").reset_index(name=rotulo)
+    fig = px.choropleth(
+        tabela,
+        geojson=geojson_estados(tuple(sorted(estados)) if estados is not None else None),
+        locations="state_code",
+        featureidkey="properties.sigla",
+        color=rotulo,
+        color_continuous_scale=escala,
+        scope="south america",
+        title=titulo,
+    )
+    fig.update_geos(fitbounds="locations", visible=False)
+    return fig
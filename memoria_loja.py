@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+
+import pandas as pd
+
+# --- RELATÓRIO DE MEMÓRIA ---
+# Mostra quanto a base ocupa por coluna e quanto cada página custa num processo novo: RSS antes
+# de abrir a página (Python + bibliotecas), depois de abrir, o pico, e o tamanho dos objetos
+# compartilhados que ela deixou carregados (base, cubo, tabela de pedidos).
+
+PAGINAS = ["loja_bot.py", "pages/dashboard_loja.py", "pages/logistica_regional_loja.py"]
+
+
+def rss_atual_mb():
+    # /proc só existe no Linux; fora dele fica só o pico
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return float("nan")
+
+
+def pico_rss_mb():
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 2**20 if sys.platform == "darwin" else pico / 1024
+
+
+def zerar_pico_rss():
+    # "5" em clear_refs faz o pico (VmHWM) recomeçar do RSS atual; devolve False se não deu (fora do Linux)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def pico_rss_desde_zerar_mb():
+    # pico desde o último zerar_pico_rss(); sem /proc, o pico do processo inteiro
+    try:
+        with open("/proc/self/status") as f:
+            linha = next(linha for linha in f if linha.startswith("VmHWM:"))
+        return int(linha.split()[1]) / 1024
+    except (OSError, StopIteration):
+        return pico_rss_mb()
+
+
+def memoria_mb(df):
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def memoria_colunas(df):
+    uso = df.memory_usage(deep=True, index=False) / 2**20
+    tabela = pd.DataFrame({"tipo": df.dtypes.astype(str), "mb": uso})
+    return tabela.sort_values("mb", ascending=False)
+
+
+def memoria_objetos():
+    # só olha os módulos já importados: não carrega nada que a página não tenha carregado
+    objetos = {}
+    for modulo, nome in (("dados_loja", "base"), ("cubo_loja", "cubo"), ("pedidos_loja", "pedidos")):
+        cache = getattr(sys.modules.get(modulo), "_cache", {})
+        objetos[f"{nome}_mb"] = sum(memoria_mb(valor[1]) for valor in cache.values())
+    # índices de cidades: vetores numpy em vez de DataFrames
+    cache = getattr(sys.modules.get("cidades_loja"), "_cache", {})
+    objetos["indice_cidades_mb"] = sum(parte.nbytes for valor in cache.values() for parte in valor[1]) / 2**20
+    return objetos
+
+
+def medir_pagina(arquivo):
+    from benchmark_loja import rodar_pagina
+
+    antes = rss_atual_mb()
+    rodar_pagina(arquivo)
+    return {"pagina": arquivo, "rss_antes_mb": antes, "rss_mb": rss_atual_mb(), "pico_rss_mb": pico_rss_mb(), **memoria_objetos()}
+
+
+def medir_paginas(paginas=PAGINAS):
+    # um processo por página, para uma não herdar o que a outra carregou
+    resultados = []
+    for arquivo in paginas:
+        comando = [sys.executable, os.path.abspath(__file__), "--medir-pagina", arquivo]
+        saida = subprocess.run(comando, stdout=subprocess.PIPE, text=True, check=True).stdout
+        resultados.append(json.loads(saida.strip().splitlines()[-1]))
+    return pd.DataFrame(resultados)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memória da base por coluna e de cada página aberta sozinha.")
+    parser.add_argument("--paginas", action="store_true", help="abre cada página num processo novo e mede o RSS")
+    parser.add_argument("--medir-pagina", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir_pagina:
+        import logging
+
+        logging.disable(logging.WARNING)
+        print(json.dumps(medir_pagina(args.medir_pagina)))
+    elif args.paginas:
+        print(medir_paginas().to_string(index=False, float_format="{:,.1f}".format))
+    else:
+        from dados_loja import carregar_base
+
+        base = carregar_base()
+        print(memoria_colunas(base).to_string(float_format="{:,.1f}".format))
+        print(f"\n{len(base):,} linhas, {memoria_mb(base):,.1f} MB; RSS do processo {rss_atual_mb():,.0f} MB")
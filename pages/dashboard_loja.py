@@ -2,6 +2,14 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import date, timedelta
+from dados_loja import carregar_vendedor_preparado, listar_vendedores, versao_dados, filtrar_periodo, frete_medio
+from cubo_loja import construir_cubo, consultar_periodo, kpis, faturamento_mensal, faturamento_dia_semana, somar_por
+from comparacao_loja import comparar
+from mapa_loja import mapa_estados
+from graficos_loja import histograma, agregar_dispersao
+from atrasos_loja import DIMENSOES_ATRASO, resumo_atrasos, figura_atrasos
+from pedidos_loja import um_por_pedido
+from perfil_loja import iniciar_perfil, etapa, grafico
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(
@@ -9,6 +17,7 @@ st.set_page_config(
     page_title="Portal do Vendedor",
     page_icon="🏪"
 )
+iniciar_perfil("dashboard_loja")
 
 
 st.markdown("""
@@ -18,44 +27,187 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# --- ID DO VENDEDOR SELECIONADO ---
+# --- VENDEDOR PADRÃO E LIMITE DE LOJAS EM CACHE ---
 SELLER_ID_ESCOLHIDO = "4a3ca9315b744ce9f8e9374361493884"
+MAX_LOJAS_EM_CACHE = 32
 
+# indicador: (rótulo, formato, se subir é ruim)
+KPIS_COMPARATIVO = {
+    "faturamento": ("Faturamento", "R$ {:,.2f}", False),
+    "pedidos": ("Pedidos", "{:,.0f}", False),
+    "ticket_medio": ("Ticket Médio", "R$ {:,.2f}", False),
+    "nota_media": ("Nota Média", "{:.2f} ⭐", False),
+    "tempo_medio_entrega": ("Tempo de Entrega", "{:.1f} dias", True),
+    "frete_medio": ("Frete Médio", "R$ {:,.2f}", True),
+}
+DIMENSOES_COMPARATIVO = {"customer_state": "Estado", "product_category_name_english": "Categoria"}
 
 
-@st.cache_data
-def carregar_dados_vendedor(seller_id):
-    df_total = pd.read_csv("dataset_olist_final_limpo.csv", parse_dates=["order_purchase_timestamp", "order_delivered_customer_date"])
-    df_seller = df_total[df_total['seller_id'] == seller_id].copy()
-    
-    try:
-        df_seller.loc[:, 'order_purchase_timestamp'] = df_seller['order_purchase_timestamp'].dt.tz_localize('UTC').dt.tz_convert('America/Sao_Paulo')
-        df_seller.loc[:, 'order_delivered_customer_date'] = df_seller['order_delivered_customer_date'].dt.tz_localize('UTC').dt.tz_convert('America/Sao_Paulo')
-    except TypeError:
-        df_seller.loc[:, 'order_purchase_timestamp'] = df_seller['order_purchase_timestamp'].dt.tz_convert('America/Sao_Paulo')
-        df_seller.loc[:, 'order_delivered_customer_date'] = df_seller['order_delivered_customer_date'].dt.tz_convert('America/Sao_Paulo')
-    
-    df_seller.dropna(subset=['order_delivered_customer_date', 'order_purchase_timestamp'], inplace=True)
-    df_seller["tempo_entrega"] = (df_seller["order_delivered_customer_date"] - df_seller["order_purchase_timestamp"]).dt.days
-    df_seller["ano_mes"] = df_seller["order_purchase_timestamp"].dt.to_period("M").astype(str)
-    df_seller["dia_da_semana"] = df_seller["order_purchase_timestamp"].dt.day_name()
-    
-    return df_seller
+
+# `versao` faz parte da chave do cache: quando o CSV muda, as lojas são relidas.
+# max_entries mantém o cache limitado, independente de quantas lojas forem abertas.
+# cache_resource devolve o próprio objeto (cache_data devolveria uma cópia a cada execução): com
+# snapshot, as colunas da loja continuam apontando para o arquivo mapeado, compartilhado entre os
+# processos. Os DataFrames são só lidos pela página, nunca alterados.
+@st.cache_resource(max_entries=MAX_LOJAS_EM_CACHE)
+def carregar_dados_vendedor(seller_id, versao):
+    # horário de Brasília, só pedidos entregues e colunas derivadas; com snapshot, já vem pronto do disco
+    return carregar_vendedor_preparado(seller_id)
+
+
+@st.cache_resource(max_entries=MAX_LOJAS_EM_CACHE)
+def carregar_cubo_vendedor(seller_id, versao):
+    return construir_cubo(carregar_dados_vendedor(seller_id, versao))
+
+
+# --- FIGURAS POR (LOJA, PERÍODO, GRÁFICO) ---
+# Cada gráfico é montado só quando a sua seção aparece e fica em cache por (loja, período,
+# gráfico): voltar a uma seção ou a um período já visto não refaz agregação nem figura. O recorte
+# do período (`_dados`) fica fora da chave, que já o determina.
+def _fig_faturamento_mensal(cubo_periodo):
+    faturamento_mes = faturamento_mensal(cubo_periodo).reset_index()
+    fig = px.bar(faturamento_mes, x="ano_mes", y="faturamento", labels={'faturamento': 'Faturamento (R$)', 'ano_mes': 'Mês'}, text='faturamento')
+    fig.update_traces(texttemplate='R$ %{text:,.2s}')
+    return fig
+
+
+def _fig_faturamento_dia_semana(cubo_periodo):
+    dias_map = {"Monday": "Segunda", "Tuesday": "Terça", "Wednesday": "Quarta", "Thursday": "Quinta", "Friday": "Sexta", "Saturday": "Sábado", "Sunday": "Domingo"}
+    faturamento_dia = faturamento_dia_semana(cubo_periodo).reset_index()
+    faturamento_dia['dia_da_semana'] = faturamento_dia['dia_da_semana'].map(dias_map)
+    return px.bar(faturamento_dia, x="dia_da_semana", y="faturamento", labels={'faturamento': 'Faturamento (R$)', 'dia_da_semana': 'Dia da Semana'})
+
+
+def _fig_mapa(cubo_periodo):
+    # pedidos distintos: o estado é do pedido, então os pesos de cada pedido somam 1 no seu estado
+    pedidos_estado = somar_por(cubo_periodo, 'customer_state', 'pedidos').round().astype(int)
+    return mapa_estados(pedidos_estado, "Mapa de Pedidos por Estado", "orders")
+
+
+def _fig_pagamentos(cubo_periodo):
+    pagamentos = somar_por(cubo_periodo, 'payment_type', 'itens').reset_index()
+    return px.pie(pagamentos, names='payment_type', values='itens', title="Distribuição por Tipo de Pagamento", hole=0.4)
+
+
+def _fig_top_faturamento(df_periodo):
+    top_faturamento = df_periodo.groupby('product_category_name_english', observed=True)['faturamento_rateado'].sum().nlargest(5).sort_values(ascending=True).reset_index(name='payment_value')
+    fig = px.bar(top_faturamento, x='payment_value', y='product_category_name_english', orientation='h', text='payment_value', labels={'product_category_name_english': 'Categoria'})
+    fig.update_traces(texttemplate='R$ %{text:,.2f}')
+    return fig
+
+
+def _fig_top_unidades(df_periodo):
+    # cada item aparece uma vez por pagamento do pedido; peso_item conta cada um só uma vez
+    unidades = df_periodo.groupby('product_category_name_english', observed=True)['peso_item'].sum().round().astype(int)
+    top_unidades = unidades.loc[lambda s: s > 0].nlargest(5).sort_values(ascending=True).reset_index(name='count')
+    return px.bar(top_unidades, x='count', y='product_category_name_english', orientation='h', text='count', labels={'product_category_name_english': 'Categoria'})
+
+
+def _fig_portfolio(df_periodo):
+    # preço médio por item vendido: como nas unidades, cada linha pesa peso_item (o item se repete por pagamento)
+    precos = df_periodo.assign(preco_itens=df_periodo['price'].astype('float64') * df_periodo['peso_item'])
+    df_portfolio = precos.groupby('product_category_name_english', observed=True).agg(preco_itens=('preco_itens', 'sum'), unidades_vendidas=('peso_item', 'sum'), faturamento_total=('faturamento_rateado', 'sum')).reset_index()
+    df_portfolio['preco_medio'] = df_portfolio['preco_itens'] / df_portfolio['unidades_vendidas']
+    df_portfolio = agregar_dispersao(df_portfolio, 'unidades_vendidas', 'preco_medio', tamanho='faturamento_total', cor='product_category_name_english')
+    return px.scatter(df_portfolio, x="unidades_vendidas", y="preco_medio", size="faturamento_total", color="product_category_name_english", hover_name="product_category_name_english", labels={'unidades_vendidas': 'Unidades Vendidas', 'preco_medio': 'Preço Médio (R$)'}, title="Portfólio: Preço x Volume x Faturamento")
+
+
+def _fig_tempo_estado(df_periodo):
+    tempo_estado = um_por_pedido(df_periodo).groupby('customer_state', observed=True)['tempo_entrega'].mean().sort_values(ascending=False).reset_index()
+    fig = px.bar(tempo_estado.head(10), x='tempo_entrega', y='customer_state', orientation='h', title="Top 10 Piores Tempos de Entrega", labels={'customer_state': 'Estado', 'tempo_entrega': 'Dias'})
+    fig.update_layout(yaxis={'categoryorder':'total ascending'})
+    return fig
+
+
+def _fig_frete_estado(df_periodo):
+    frete_estado = frete_medio(df_periodo, 'customer_state').sort_values(ascending=False).reset_index()
+    fig = px.bar(frete_estado.head(10), x='freight_value', y='customer_state', orientation='h', title="Top 10 Maiores Custos de Frete", labels={'customer_state': 'Estado', 'freight_value': 'Frete (R$)'})
+    fig.update_layout(yaxis={'categoryorder':'total ascending'})
+    return fig
+
+
+def _fig_histograma_entrega(df_periodo):
+    # barras calculadas aqui: a figura leva 30 contagens, não uma linha por pedido
+    barras = histograma(um_por_pedido(df_periodo)['tempo_entrega'], nbins=30)
+    fig = px.bar(barras, x='centro', y='contagem', hover_data={'centro': False, 'inicio': True, 'fim': True}, title="Distribuição do Tempo de Entrega", labels={'centro': 'tempo_entrega', 'contagem': 'count', 'inicio': 'de (dias)', 'fim': 'até (dias)'})
+    fig.update_traces(width=barras['fim'] - barras['inicio'])
+    fig.update_layout(bargap=0)
+    return fig
+
+
+def _fig_custo_tempo(df_periodo):
+    df_scatter = um_por_pedido(df_periodo).groupby('customer_state', observed=True).agg(tempo_medio=('tempo_entrega', 'mean'), pedidos=('pedido', 'size'))
+    df_scatter['frete_medio'] = frete_medio(df_periodo, 'customer_state')
+    df_scatter = df_scatter.reset_index()
+    return px.scatter(df_scatter, x='tempo_medio', y='frete_medio', size='pedidos', color='pedidos', hover_name='customer_state', title="Custo x Tempo por Estado")
+
+
+GRAFICOS = {
+    "faturamento mensal": _fig_faturamento_mensal,
+    "faturamento por dia da semana": _fig_faturamento_dia_semana,
+    "mapa por estado": _fig_mapa,
+    "pagamentos": _fig_pagamentos,
+    "top faturamento": _fig_top_faturamento,
+    "top unidades": _fig_top_unidades,
+    "portfólio": _fig_portfolio,
+    "tempo por estado": _fig_tempo_estado,
+    "frete por estado": _fig_frete_estado,
+    "histograma de entrega": _fig_histograma_entrega,
+    "custo x tempo": _fig_custo_tempo,
+}
+
+
+@st.cache_data(max_entries=len(GRAFICOS) * MAX_LOJAS_EM_CACHE)
+def figura_vendedor(_dados, seller_id, versao, inicio, fim, nome):
+    return GRAFICOS[nome](_dados)
+
+
+def mostrar_grafico(nome, dados, seller_id, versao, inicio, fim):
+    with etapa(f"figura: {nome}", dados):
+        fig = figura_vendedor(dados, seller_id, versao, inicio, fim, nome)
+    grafico(nome, fig, use_container_width=True)
+
+
+# atrasos por (loja, período, quebra): trocar de quebra não refaz as outras
+@st.cache_data(max_entries=4 * MAX_LOJAS_EM_CACHE)
+def tabela_atrasos_vendedor(seller_id, versao, inicio, fim, dimensao):
+    return resumo_atrasos(filtrar_periodo(carregar_dados_vendedor(seller_id, versao), inicio, fim), dimensao)
+
+
+def trocar_vendedor():
+    # o período da loja anterior pode não existir na nova, então o slider volta ao padrão
+    st.session_state.pop("date_range", None)
 
 
 try:
-    df_loja = carregar_dados_vendedor(SELLER_ID_ESCOLHIDO)
-    if df_loja.empty:
-        st.error(f"Nenhum dado encontrado para o vendedor com ID: {SELLER_ID_ESCOLHIDO}.")
-        st.stop()
+    versao = versao_dados()
+    vendedores = listar_vendedores()
 except Exception as e:
     st.error(f"Erro ao carregar o arquivo de dados: {e}")
     st.stop()
 
 # --- SIDEBAR 
 st.sidebar.title("Portal do Vendedor")
-st.sidebar.markdown(f"**Loja em análise:**")
-st.sidebar.code(f"{SELLER_ID_ESCOLHIDO}")
+seller_id = st.sidebar.selectbox(
+    "Loja em análise:",
+    options=vendedores,
+    index=vendedores.index(SELLER_ID_ESCOLHIDO) if SELLER_ID_ESCOLHIDO in vendedores else 0,
+    on_change=trocar_vendedor,
+    key="seller_id"
+)
+
+try:
+    with etapa("carga: linhas da loja"):
+        df_loja = carregar_dados_vendedor(seller_id, versao)
+    with etapa("carga: cubo da loja", df_loja):
+        cubo_loja = carregar_cubo_vendedor(seller_id, versao)
+    if df_loja.empty:
+        st.error(f"Nenhum dado encontrado para o vendedor com ID: {seller_id}.")
+        st.stop()
+except Exception as e:
+    st.error(f"Erro ao carregar o arquivo de dados: {e}")
+    st.stop()
+
 st.sidebar.markdown("---")
 data_min_loja = df_loja["order_purchase_timestamp"].min().date()
 data_max_loja = df_loja["order_purchase_timestamp"].max().date()
@@ -70,118 +222,178 @@ st.sidebar.slider(
 st.sidebar.markdown("---") 
 
 
-selecao = st.radio("Navegue pelas seções:", ["Visão Geral", "Meus Produtos", "Análise de Logística"], horizontal=True)
+selecao = st.radio("Navegue pelas seções:", ["Visão Geral", "Meus Produtos", "Análise de Logística", "Comparativo"], horizontal=True)
 
 
 start_date, end_date = st.session_state.date_range 
-df_filtrado_pagina = df_loja[(df_loja["order_purchase_timestamp"].dt.date >= start_date) & (df_loja["order_purchase_timestamp"].dt.date <= end_date)]
 
-# --- LÓGICA DE EXIBIÇÃO DAS PÁGINAS ---
 
-if selecao == "Visão Geral":
+# --- SEÇÕES ---
+# Só a seção escolhida roda, e cada uma recorta apenas o que usa (cubo ou linhas do período).
+# Os painéis com controles próprios são fragmentos: mexer neles reroda só o painel.
+@st.fragment
+def painel_prazo(seller_id, versao, inicio, fim):
+    iniciar_perfil("dashboard_loja (prazo de entrega)", fragmento=True)
+    with etapa("agregação: atrasos"):
+        total_atrasos = tabela_atrasos_vendedor(seller_id, versao, inicio, fim, None).iloc[0]
+    if total_atrasos['pedidos'] > 0:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Entregas no Prazo", f"{total_atrasos['taxa_no_prazo']:.1%}")
+        col2.metric("Pedidos Atrasados", f"{int(total_atrasos['atrasados']):,}")
+        col3.metric("Dias vs. Prazo (p50 / p90 / p99)", f"{total_atrasos['atraso_p50']:+.0f} / {total_atrasos['atraso_p90']:+.0f} / {total_atrasos['atraso_p99']:+.0f}")
+        dimensao_atraso = st.selectbox("Atrasos por:", options=["customer_state", "customer_city", "ano_mes"], format_func=DIMENSOES_ATRASO.get, key="dimensao_atraso")
+        with etapa(f"agregação: atrasos por {dimensao_atraso}"):
+            tabela_atrasos = tabela_atrasos_vendedor(seller_id, versao, inicio, fim, dimensao_atraso)
+        with etapa("figura: atrasos"):
+            fig_atrasos = figura_atrasos(tabela_atrasos, dimensao_atraso)
+        grafico("atrasos", fig_atrasos, use_container_width=True)
+    else:
+        st.info("Nenhuma entrega com prazo estimado no período.")
+
+
+@st.fragment
+def detalhamento_comparativo(comparacao):
+    iniciar_perfil("dashboard_loja (detalhamento)", fragmento=True)
+    col1, col2 = st.columns(2)
+    dimensao = col1.selectbox("Quebrar por:", options=list(DIMENSOES_COMPARATIVO), format_func=DIMENSOES_COMPARATIVO.get)
+    kpi = col2.selectbox("Indicador:", options=list(KPIS_COMPARATIVO), format_func=lambda k: KPIS_COMPARATIVO[k][0])
+    tabela = comparacao[dimensao][kpi].dropna(subset=['atual']).sort_values('atual', ascending=False)
+    tabela.index.name = DIMENSOES_COMPARATIVO[dimensao]
+    top_tabela = tabela.head(10).reset_index().melt(id_vars=DIMENSOES_COMPARATIVO[dimensao], value_vars=['atual', 'anterior', 'ano_anterior'], var_name='Período', value_name=KPIS_COMPARATIVO[kpi][0])
+    top_tabela['Período'] = top_tabela['Período'].map({'atual': 'Atual', 'anterior': 'Período anterior', 'ano_anterior': 'Ano anterior'})
+    with etapa("figura: comparativo"):
+        fig_comp = px.bar(top_tabela, x=DIMENSOES_COMPARATIVO[dimensao], y=KPIS_COMPARATIVO[kpi][0], color='Período', barmode='group', title=f"Top 10 por {KPIS_COMPARATIVO[kpi][0]}")
+    grafico("comparativo", fig_comp, use_container_width=True)
+    st.dataframe(
+        tabela.rename(columns={'atual': 'Atual', 'anterior': 'Período anterior', 'var_anterior': 'Δ% anterior', 'ano_anterior': 'Ano anterior', 'var_ano_anterior': 'Δ% ano anterior'}),
+        use_container_width=True
+    )
+
+
+def secao_visao_geral(seller_id, versao, start_date, end_date):
     st.title("📈 Visão Geral da Loja")
     st.markdown(f"Analisando de **{start_date.strftime('%d/%m/%Y')}** a **{end_date.strftime('%d/%m/%Y')}**.")
     st.markdown("---")
-    if not df_filtrado_pagina.empty:
-        faturamento_total = df_filtrado_pagina['payment_value'].sum()
-        pedidos_totais = df_filtrado_pagina['order_id'].nunique()
-        ticket_medio = faturamento_total / pedidos_totais if pedidos_totais > 0 else 0
-        nota_media = df_filtrado_pagina['review_score'].mean()
-        col1, col2, col3, col4 = st.columns(4)
-        col1.metric("Faturamento Total", f"R$ {faturamento_total:,.2f}")
-        col2.metric("Total de Pedidos", f"{pedidos_totais}")
-        col3.metric("Ticket Médio", f"R$ {ticket_medio:,.2f}")
-        col4.metric("Nota Média", f"{nota_media:.2f} ⭐")
-        st.markdown("---")
-        
-        col_graf1, col_graf2 = st.columns(2)
-        with col_graf1:
-            st.subheader("Faturamento Mensal")
-            faturamento_mes = df_filtrado_pagina.groupby("ano_mes")['payment_value'].sum().reset_index()
-            fig = px.bar(faturamento_mes, x="ano_mes", y="payment_value", labels={'payment_value': 'Faturamento (R$)', 'ano_mes': 'Mês'}, text='payment_value')
-            fig.update_traces(texttemplate='R$ %{text:,.2s}')
-            st.plotly_chart(fig, use_container_width=True)
-        with col_graf2:
-            st.subheader("Faturamento por Dia da Semana")
-            dias_ordem = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-            dias_map = {"Monday": "Segunda", "Tuesday": "Terça", "Wednesday": "Quarta", "Thursday": "Quinta", "Friday": "Sexta", "Saturday": "Sábado", "Sunday": "Domingo"}
-            faturamento_dia = df_filtrado_pagina.groupby("dia_da_semana")['payment_value'].sum().reindex(dias_ordem).reset_index()
-            faturamento_dia['dia_da_semana'] = faturamento_dia['dia_da_semana'].map(dias_map)
-            fig2 = px.bar(faturamento_dia, x="dia_da_semana", y="payment_value", labels={'payment_value': 'Faturamento (R$)', 'dia_da_semana': 'Dia da Semana'})
-            st.plotly_chart(fig2, use_container_width=True)
-
-        st.markdown("---")
-        st.subheader("Distribuição Geográfica e de Pagamentos")
-        col_mapa, col_pizza = st.columns(2)
-        with col_mapa:
-            vendas_estado = df_filtrado_pagina['customer_state'].value_counts().reset_index()
-            vendas_estado.columns = ['state_code', 'orders']
-            fig_mapa = px.choropleth(vendas_estado, geojson="https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson", locations='state_code', featureidkey="properties.sigla", color='orders', color_continuous_scale="Oranges", scope="south america", title="Mapa de Pedidos por Estado")
-            fig_mapa.update_geos(fitbounds="locations", visible=False)
-            st.plotly_chart(fig_mapa, use_container_width=True)
-        with col_pizza:
-            pagamentos = df_filtrado_pagina['payment_type'].value_counts().reset_index()
-            fig_pizza = px.pie(pagamentos, names='payment_type', values='count', title="Distribuição por Tipo de Pagamento", hole=0.4)
-            st.plotly_chart(fig_pizza, use_container_width=True)
-    else:
+    with etapa("filtro: período", cubo_loja):
+        cubo_periodo = consultar_periodo(cubo_loja, start_date, end_date)
+    if cubo_periodo.empty:
         st.warning("Não há dados para o período selecionado.")
+        return
+    with etapa("agregação: kpis", cubo_periodo):
+        metricas = kpis(cubo_periodo)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Faturamento Total", f"R$ {metricas['faturamento']:,.2f}")
+    col2.metric("Total de Pedidos", f"{metricas['pedidos']}")
+    col3.metric("Ticket Médio", f"R$ {metricas['ticket_medio']:,.2f}")
+    col4.metric("Nota Média", f"{metricas['nota_media']:.2f} ⭐")
+    st.markdown("---")
+
+    col_graf1, col_graf2 = st.columns(2)
+    with col_graf1:
+        st.subheader("Faturamento Mensal")
+        mostrar_grafico("faturamento mensal", cubo_periodo, seller_id, versao, start_date, end_date)
+    with col_graf2:
+        st.subheader("Faturamento por Dia da Semana")
+        mostrar_grafico("faturamento por dia da semana", cubo_periodo, seller_id, versao, start_date, end_date)
+
+    st.markdown("---")
+    st.subheader("Distribuição Geográfica e de Pagamentos")
+    col_mapa, col_pizza = st.columns(2)
+    with col_mapa:
+        mostrar_grafico("mapa por estado", cubo_periodo, seller_id, versao, start_date, end_date)
+    with col_pizza:
+        mostrar_grafico("pagamentos", cubo_periodo, seller_id, versao, start_date, end_date)
+
 
-elif selecao == "Meus Produtos":
+def secao_produtos(seller_id, versao, start_date, end_date):
     st.title("📦 Análise de Produtos")
     st.markdown(f"Analisando de **{start_date.strftime('%d/%m/%Y')}** a **{end_date.strftime('%d/%m/%Y')}**.")
     st.markdown("---")
-    df_produtos = df_filtrado_pagina.dropna(subset=['product_category_name_english'])
-    if not df_produtos.empty:
-        col1, col2 = st.columns(2)
-        with col1:
-            st.subheader("Top 5 Produtos por Faturamento")
-            top_faturamento = df_produtos.groupby('product_category_name_english')['payment_value'].sum().nlargest(5).sort_values(ascending=True).reset_index()
-            fig = px.bar(top_faturamento, x='payment_value', y='product_category_name_english', orientation='h', text='payment_value', labels={'product_category_name_english': 'Categoria'})
-            fig.update_traces(texttemplate='R$ %{text:,.2f}')
-            st.plotly_chart(fig, use_container_width=True)
-        with col2:
-            st.subheader("Top 5 Produtos por Unidades Vendidas")
-            top_unidades = df_produtos['product_category_name_english'].value_counts().nlargest(5).sort_values(ascending=True).reset_index()
-            fig2 = px.bar(top_unidades, x='count', y='product_category_name_english', orientation='h', text='count', labels={'product_category_name_english': 'Categoria'})
-            st.plotly_chart(fig2, use_container_width=True)
-        st.markdown("---")
-        st.subheader("Análise de Portfólio (Preço vs. Vendas)")
-        df_portfolio = df_produtos.groupby('product_category_name_english').agg(preco_medio=('price', 'mean'), unidades_vendidas=('order_id', 'count'), faturamento_total=('payment_value', 'sum')).reset_index()
-        fig_portfolio = px.scatter(df_portfolio, x="unidades_vendidas", y="preco_medio", size="faturamento_total", color="product_category_name_english", hover_name="product_category_name_english", labels={'unidades_vendidas': 'Unidades Vendidas', 'preco_medio': 'Preço Médio (R$)'}, title="Portfólio: Preço x Volume x Faturamento")
-        st.plotly_chart(fig_portfolio, use_container_width=True)
-    else:
+    with etapa("filtro: período", df_loja):
+        df_periodo = filtrar_periodo(df_loja, start_date, end_date)
+    # os agrupamentos por categoria já deixam de fora as linhas sem categoria
+    if not df_periodo['product_category_name_english'].notna().any():
         st.warning("Não há dados de produtos no período selecionado.")
+        return
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Top 5 Produtos por Faturamento")
+        mostrar_grafico("top faturamento", df_periodo, seller_id, versao, start_date, end_date)
+    with col2:
+        st.subheader("Top 5 Produtos por Unidades Vendidas")
+        mostrar_grafico("top unidades", df_periodo, seller_id, versao, start_date, end_date)
+    st.markdown("---")
+    st.subheader("Análise de Portfólio (Preço vs. Vendas)")
+    mostrar_grafico("portfólio", df_periodo, seller_id, versao, start_date, end_date)
+
 
-elif selecao == "Análise de Logística":
+def secao_logistica(seller_id, versao, start_date, end_date):
     st.title("🚚 Análise de Logística")
     st.markdown(f"Analisando entregas de **{start_date.strftime('%d/%m/%Y')}** a **{end_date.strftime('%d/%m/%Y')}**.")
     st.markdown("---")
-    if not df_filtrado_pagina.empty:
-        col1, col2 = st.columns(2)
-        col1.metric("Tempo Médio de Entrega", f"{df_filtrado_pagina['tempo_entrega'].mean():.1f} dias")
-        col2.metric("Frete Médio", f"R$ {df_filtrado_pagina['freight_value'].mean():,.2f}")
-        st.markdown("---")
-        st.subheader("Performance Logística por Estado")
-        col_graf1, col_graf2 = st.columns(2)
-        with col_graf1:
-            tempo_estado = df_filtrado_pagina.groupby('customer_state')['tempo_entrega'].mean().sort_values(ascending=False).reset_index()
-            fig = px.bar(tempo_estado.head(10), x='tempo_entrega', y='customer_state', orientation='h', title="Top 10 Piores Tempos de Entrega", labels={'customer_state': 'Estado', 'tempo_entrega': 'Dias'})
-            fig.update_layout(yaxis={'categoryorder':'total ascending'})
-            st.plotly_chart(fig, use_container_width=True)
-        with col_graf2:
-            frete_estado = df_filtrado_pagina.groupby('customer_state')['freight_value'].mean().sort_values(ascending=False).reset_index()
-            fig2 = px.bar(frete_estado.head(10), x='freight_value', y='customer_state', orientation='h', title="Top 10 Maiores Custos de Frete", labels={'customer_state': 'Estado', 'freight_value': 'Frete (R$)'})
-            fig2.update_layout(yaxis={'categoryorder':'total ascending'})
-            st.plotly_chart(fig2, use_container_width=True)
-        st.markdown("---")
-        st.subheader("Consistência e Custo-Benefício")
-        col_hist, col_scatter = st.columns(2)
-        with col_hist:
-            fig_hist = px.histogram(df_filtrado_pagina, x='tempo_entrega', nbins=30, title="Distribuição do Tempo de Entrega")
-            st.plotly_chart(fig_hist, use_container_width=True)
-        with col_scatter:
-            df_scatter = df_filtrado_pagina.groupby('customer_state').agg(tempo_medio=('tempo_entrega', 'mean'), frete_medio=('freight_value', 'mean'), pedidos=('order_id', 'count')).reset_index()
-            fig_scatter = px.scatter(df_scatter, x='tempo_medio', y='frete_medio', size='pedidos', color='pedidos', hover_name='customer_state', title="Custo x Tempo por Estado")
-            st.plotly_chart(fig_scatter, use_container_width=True)
-    else:
-        st.warning("Não há dados de logística no período selecionado.")
\ No newline at end of file
+    with etapa("filtro: período", df_loja):
+        df_periodo = filtrar_periodo(df_loja, start_date, end_date)
+    if df_periodo.empty:
+        st.warning("Não há dados de logística no período selecionado.")
+        return
+    col1, col2 = st.columns(2)
+    # por pedido, como o tempo de entrega do cubo (Comparativo) e da página regional
+    col1.metric("Tempo Médio de Entrega", f"{um_por_pedido(df_periodo)['tempo_entrega'].mean():.1f} dias")
+    col2.metric("Frete Médio", f"R$ {frete_medio(df_periodo):,.2f}")
+    st.markdown("---")
+    st.subheader("Performance Logística por Estado")
+    col_graf1, col_graf2 = st.columns(2)
+    with col_graf1:
+        mostrar_grafico("tempo por estado", df_periodo, seller_id, versao, start_date, end_date)
+    with col_graf2:
+        mostrar_grafico("frete por estado", df_periodo, seller_id, versao, start_date, end_date)
+    st.markdown("---")
+    st.subheader("Consistência e Custo-Benefício")
+    col_hist, col_scatter = st.columns(2)
+    with col_hist:
+        mostrar_grafico("histograma de entrega", df_periodo, seller_id, versao, start_date, end_date)
+    with col_scatter:
+        mostrar_grafico("custo x tempo", df_periodo, seller_id, versao, start_date, end_date)
+    st.markdown("---")
+    st.subheader("Prazo de Entrega")
+    painel_prazo(seller_id, versao, start_date, end_date)
+
+
+def secao_comparativo(seller_id, versao, start_date, end_date):
+    st.title("📊 Comparativo de Períodos")
+    st.markdown(f"Comparando **{start_date.strftime('%d/%m/%Y')}** a **{end_date.strftime('%d/%m/%Y')}** com o período anterior e com o mesmo período do ano anterior.")
+    st.markdown("---")
+    with etapa("agregação: comparativo", cubo_loja):
+        comparacao = comparar(cubo_loja, start_date, end_date, dimensoes=tuple(DIMENSOES_COMPARATIVO))
+    total = comparacao[None].iloc[0]
+    if consultar_periodo(cubo_loja, start_date, end_date).empty:
+        st.warning("Não há dados para o período selecionado.")
+        return
+
+    def formatar(valor, formato):
+        return "—" if pd.isna(valor) else formato.format(valor)
+
+    colunas = st.columns(len(KPIS_COMPARATIVO))
+    for col, (kpi, (rotulo, formato, inverso)) in zip(colunas, KPIS_COMPARATIVO.items()):
+        col.metric(
+            rotulo,
+            formatar(total[(kpi, 'atual')], formato),
+            delta=formatar(total[(kpi, 'var_anterior')], "{:+.1f}% vs. anterior") if pd.notna(total[(kpi, 'var_anterior')]) else None,
+            delta_color="inverse" if inverso else "normal"
+        )
+        col.caption(f"Ano anterior: {formatar(total[(kpi, 'ano_anterior')], formato)} ({formatar(total[(kpi, 'var_ano_anterior')], '{:+.1f}%')})")
+    st.markdown("---")
+
+    st.subheader("Detalhamento")
+    detalhamento_comparativo(comparacao)
+
+
+SECOES = {
+    "Visão Geral": secao_visao_geral,
+    "Meus Produtos": secao_produtos,
+    "Análise de Logística": secao_logistica,
+    "Comparativo": secao_comparativo,
+}
+
+# --- LÓGICA DE EXIBIÇÃO DAS PÁGINAS ---
+SECOES[selecao](seller_id, versao, start_date, end_date)
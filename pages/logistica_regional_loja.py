@@ -1,22 +1,71 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+from dados_loja import carregar_base, frete_medio, posicoes_periodo, versao_dados
+from mapa_loja import mapa_estados
+from pedidos_loja import carregar_pedidos
+from cidades_loja import carregar_indice, cidades_no_periodo, linhas_selecionadas, ranking_cidades
+from atrasos_loja import DIMENSOES_ATRASO, resumo_atrasos, figura_atrasos
+from regioes_loja import REGIOES, regiao_dos_estados, estados_das_regioes
+from perfil_loja import iniciar_perfil, etapa, grafico
 
 st.set_page_config(page_title="📦 Logística por Região", layout="wide")
-st.title("📦 Logística por Região - Norte e Nordeste")
-
-@st.cache_data
-def carregar_dados():
-    df = pd.read_csv(
-        "dataset_olist_final_limpo.csv",
-        parse_dates=["order_purchase_timestamp", "order_delivered_customer_date", "order_estimated_delivery_date"]
+iniciar_perfil("logistica_regional_loja")
+st.title("📦 Logística por Região")
+
+
+# linhas dos estados escolhidos no período (e nas cidades escolhidas), pelo índice de cidades
+def recorte_regional(tabela, inicio, fim, estados, cidades):
+    df = carregar_base() if tabela == "base" else carregar_pedidos()
+    pos_inicio, pos_fim = posicoes_periodo(df, inicio, fim)
+    return df.iloc[linhas_selecionadas(carregar_indice(tabela), pos_inicio, pos_fim, estados, cidades)]
+
+
+# mesmo mapa do portal do vendedor, recortado para as regiões escolhidas; refeito só quando o recorte muda
+@st.cache_data(max_entries=32)
+def figura_mapa_regional(versao, inicio, fim, estados, cidades):
+    # por pedido, como no comparativo entre regiões: cada pedido pesa uma vez, não uma vez por linha
+    pedidos = recorte_regional("pedidos", inicio, fim, estados, cidades)
+    tempo_estado = pedidos.groupby("customer_state", observed=True)["tempo_entrega"].mean().dropna()
+    return mapa_estados(tempo_estado, "Tempo Médio de Entrega (dias)", "tempo_entrega", estados=list(estados))
+
+
+# indicadores de todas as regiões escolhidas num único groupby da tabela de pedidos; o agrupamento
+# padrão usa a coluna `regiao` da carga, um personalizado traduz os códigos de estado uma vez
+@st.cache_data(max_entries=32)
+def resumo_regioes(versao, inicio, fim, grupos, personalizado, cidades):
+    grupos = {nome: list(estados) for nome, estados in grupos}
+    pedidos = recorte_regional("pedidos", inicio, fim, estados_das_regioes(grupos, grupos), cidades)
+    regiao = regiao_dos_estados(pedidos["customer_state"], grupos) if personalizado else pedidos["regiao"]
+    resumo = pedidos.groupby(regiao, observed=True).agg(
+        pedidos=("pedido", "size"),
+        faturamento=("faturamento", "sum"),
+        tempo_medio=("tempo_entrega", "mean"),
+        frete_medio=("frete", "mean"),
     )
-    df["tempo_entrega"] = (df["order_delivered_customer_date"] - df["order_purchase_timestamp"]).dt.days
-    df["ano_mes"] = df["order_purchase_timestamp"].dt.to_period("M").astype(str)
-    return df
+    resumo["ticket_medio"] = resumo["faturamento"] / resumo["pedidos"]
+    return resumo.rename_axis("regiao")
+
+
+# atrasos por (período, cidades, quebra), no mesmo recorte do mapa
+@st.cache_data(max_entries=32)
+def atrasos_regionais(versao, inicio, fim, estados, cidades, dimensao):
+    df = recorte_regional("base", inicio, fim, estados, cidades)
+    return resumo_atrasos(df, dimensao)
+
+
+# cidades com mais pedidos (ou maior tempo/frete médio) no recorte, somadas pelo índice da tabela de pedidos
+@st.cache_data(max_entries=32)
+def tabela_ranking_cidades(versao, inicio, fim, estados, cidades, ordem, n):
+    pedidos = carregar_pedidos()
+    pos_inicio, pos_fim = posicoes_periodo(pedidos, inicio, fim)
+    return ranking_cidades(pedidos, carregar_indice("pedidos"), pos_inicio, pos_fim, estados, cidades, ordem, n)
+
 
 try:
-    df_total = carregar_dados()
+    with etapa("carga: base, pedidos e índice de cidades"):
+        df_total = carregar_base()
+        pedidos_total = carregar_pedidos()
+        indice_base = carregar_indice("base")
 except Exception as e:
     st.error(f"Erro ao carregar dados: {e}")
     st.stop()
@@ -32,42 +81,51 @@ start_date, end_date = st.slider(
     value=(data_min_geral, data_max_geral)
 )
 
-df_filtrado = df_total[
-    (df_total["order_purchase_timestamp"].dt.date >= start_date) &
-    (df_total["order_purchase_timestamp"].dt.date <= end_date)
-]
+inicio_periodo, fim_periodo = posicoes_periodo(df_total, start_date, end_date)
 
-# Filtro por regiões
-norte = ["AM", "RR", "AP", "PA", "TO", "RO", "AC"]
-nordeste = ["MA", "PI", "CE", "RN", "PB", "PE", "AL", "SE", "BA"]
-df_log_regional = df_filtrado[df_filtrado["customer_state"].isin(norte + nordeste)].copy()
+
+# --- FILTRO DE REGIÕES ---
+regioes_selecionadas = st.multiselect("Regiões:", options=list(REGIOES), default=["Norte", "Nordeste"])
+with st.expander("Agrupamento personalizado de estados (opcional)"):
+    col1, col2 = st.columns([1, 3])
+    nome_grupo = col1.text_input("Nome do grupo:", value="Personalizado").strip() or "Personalizado"
+    estados_grupo = col2.multiselect("Estados:", options=sorted(estados_das_regioes(REGIOES)), placeholder="Estados saem das suas regiões e entram neste grupo")
+
+# o grupo personalizado vem primeiro e tira os seus estados das regiões escolhidas
+grupos = {nome_grupo: estados_grupo} if estados_grupo else {}
+for regiao in regioes_selecionadas:
+    restantes = [e for e in REGIOES[regiao] if e not in estados_grupo]
+    if restantes and regiao not in grupos:
+        grupos[regiao] = restantes
+if not grupos:
+    st.warning("Selecione ao menos uma região ou um grupo de estados.")
+    st.stop()
+grupos_chave = tuple((nome, tuple(estados)) for nome, estados in grupos.items())
+estados_selecionados = tuple(estados_das_regioes(grupos, grupos))
 
 
 # --- NOVO: LÓGICA DO FILTRO DE CIDADE ---
 st.markdown("---")
-if not df_log_regional.empty:
-    # Popula a lista de cidades com base nos dados já filtrados por região e data
-    cidades_disponiveis = sorted(df_log_regional['customer_city'].unique())
-    
+# Cidades das regiões com pedidos no período, lidas do índice (sem varrer o texto das cidades)
+with etapa("filtro: cidades do período", indice_base.grupo_da_linha[inicio_periodo:fim_periodo]):
+    cidades_disponiveis = cidades_no_periodo(indice_base, inicio_periodo, fim_periodo, estados_selecionados)
+cidades_selecionadas = []
+if cidades_disponiveis:
     cidades_selecionadas = st.multiselect(
         "Filtre por Cidade (opcional):",
         options=cidades_disponiveis,
         placeholder="Selecione uma ou mais cidades"
     )
 
-    # Aplica o filtro de cidade se alguma for selecionada
-    if cidades_selecionadas:
-        df_log = df_log_regional[df_log_regional['customer_city'].isin(cidades_selecionadas)].copy()
-    else:
-        # Se nenhuma cidade for selecionada, usa todos os dados das regiões
-        df_log = df_log_regional
-else:
-    df_log = df_log_regional # Garante que df_log exista mesmo se vazio
+# Linhas das regiões (e das cidades escolhidas) tomadas por posição
+with etapa("filtro: período, regiões e cidades", df_total):
+    df_log = recorte_regional("base", start_date, end_date, estados_selecionados, cidades_selecionadas)
+    pedidos_log = recorte_regional("pedidos", start_date, end_date, estados_selecionados, cidades_selecionadas)
 
 
 # Mostra o período de análise e o filtro de cidades aplicado
 cidades_info = ", ".join(cidades_selecionadas) if cidades_selecionadas else "Todas as cidades"
-st.info(f"Análise entre **{start_date.strftime('%d/%m/%Y')}** e **{end_date.strftime('%d/%m/%Y')}** para: **{cidades_info}**.", icon="🏙️")
+st.info(f"Análise entre **{start_date.strftime('%d/%m/%Y')}** e **{end_date.strftime('%d/%m/%Y')}** em **{', '.join(grupos)}** para: **{cidades_info}**.", icon="🏙️")
 
 
 if df_log.empty:
@@ -76,10 +134,11 @@ if df_log.empty:
 
 
 st.markdown("---")
-# Calcula os valores para os indicadores com base nos dados já filtrados
-faturamento_total = df_log['payment_value'].sum()
-pedidos_totais = df_log['order_id'].nunique()
-ticket_medio = faturamento_total / pedidos_totais if pedidos_totais > 0 else 0
+# Indicadores da tabela de pedidos (uma linha por pedido, pagamentos contados uma vez)
+with etapa("agregação: kpis", pedidos_log):
+    faturamento_total = pedidos_log['faturamento'].sum()
+    pedidos_totais = len(pedidos_log)
+    ticket_medio = faturamento_total / pedidos_totais if pedidos_totais > 0 else 0
 
 
 col1, col2, col3 = st.columns(3)
@@ -89,21 +148,86 @@ col3.metric("Ticket Médio", f"R$ {ticket_medio:,.2f}")
 st.markdown("---")
 
 # Gráficos
+st.markdown("### Comparativo entre Regiões")
+with etapa("agregação: comparativo entre regiões", pedidos_log):
+    regioes = resumo_regioes(versao_dados(), start_date, end_date, grupos_chave, bool(estados_grupo), tuple(cidades_selecionadas))
+indicadores = {"pedidos": "Pedidos", "ticket_medio": "Ticket Médio (R$)", "tempo_medio": "Tempo Médio de Entrega (dias)", "frete_medio": "Frete Médio por Pedido (R$)"}
+with etapa("figura: comparativo entre regiões"):
+    dados_regioes = regioes.reset_index().melt(id_vars="regiao", value_vars=list(indicadores), var_name="indicador", value_name="valor")
+    dados_regioes["indicador"] = dados_regioes["indicador"].map(indicadores)
+    fig_regioes = px.bar(dados_regioes, x="regiao", y="valor", color="regiao", facet_col="indicador", facet_col_spacing=0.06, labels={"regiao": "Região", "valor": ""})
+    fig_regioes.update_yaxes(matches=None, showticklabels=True)
+    fig_regioes.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+    fig_regioes.update_layout(showlegend=False)
+grafico("comparativo entre regiões", fig_regioes, use_container_width=True)
+
 st.markdown("### Entregas por Estado")
-entregas_estado = df_log["customer_state"].value_counts().reset_index()
-entregas_estado.columns = ["Estado", "Pedidos"]
-fig1 = px.bar(entregas_estado, x="Pedidos", y="Estado", orientation='h')
-fig1.update_layout(yaxis={'categoryorder': 'total ascending'})
-st.plotly_chart(fig1, use_container_width=True)
+with etapa("agregação: entregas por estado", pedidos_log):
+    entregas_estado = pedidos_log["customer_state"].value_counts().loc[lambda s: s > 0].reset_index()
+    entregas_estado.columns = ["Estado", "Pedidos"]
+with etapa("figura: entregas por estado"):
+    fig1 = px.bar(entregas_estado, x="Pedidos", y="Estado", orientation='h')
+    fig1.update_layout(yaxis={'categoryorder': 'total ascending'})
+grafico("entregas por estado", fig1, use_container_width=True)
 
 st.markdown("### Tempo Médio de Entrega por Estado")
-tempo_estado = df_log.groupby("customer_state")["tempo_entrega"].mean().sort_values().reset_index()
-fig2 = px.bar(tempo_estado, x="tempo_entrega", y="customer_state", orientation='h', title="Tempo Médio de Entrega")
-fig2.update_layout(xaxis_title="Dias", yaxis_title="Estado", yaxis={'categoryorder': 'total ascending'})
-st.plotly_chart(fig2, use_container_width=True)
+with etapa("figura: mapa de tempo de entrega", pedidos_log):
+    fig_mapa = figura_mapa_regional(versao_dados(), start_date, end_date, estados_selecionados, tuple(cidades_selecionadas))
+grafico("mapa de tempo de entrega", fig_mapa, use_container_width=True)
+with etapa("agregação: tempo por estado", pedidos_log):
+    tempo_estado = pedidos_log.groupby("customer_state", observed=True)["tempo_entrega"].mean().sort_values().reset_index()
+with etapa("figura: tempo por estado"):
+    fig2 = px.bar(tempo_estado, x="tempo_entrega", y="customer_state", orientation='h', title="Tempo Médio de Entrega")
+    fig2.update_layout(xaxis_title="Dias", yaxis_title="Estado", yaxis={'categoryorder': 'total ascending'})
+grafico("tempo por estado", fig2, use_container_width=True)
 
 st.markdown("### Frete Médio por Estado")
-frete_estado = df_log.groupby("customer_state")["freight_value"].mean().sort_values().reset_index()
-fig3 = px.bar(frete_estado, x="freight_value", y="customer_state", orientation='h', title="Frete Médio por Estado")
-fig3.update_layout(xaxis_title="Valor (R$)", yaxis_title="Estado", yaxis={'categoryorder': 'total ascending'})
-st.plotly_chart(fig3, use_container_width=True)
\ No newline at end of file
+with etapa("agregação: frete por estado", df_log):
+    frete_estado = frete_medio(df_log, "customer_state").sort_values().reset_index()
+with etapa("figura: frete por estado"):
+    fig3 = px.bar(frete_estado, x="freight_value", y="customer_state", orientation='h', title="Frete Médio por Estado")
+    fig3.update_layout(xaxis_title="Valor (R$)", yaxis_title="Estado", yaxis={'categoryorder': 'total ascending'})
+grafico("frete por estado", fig3, use_container_width=True)
+
+st.markdown("### Principais Cidades")
+ordens_ranking = {"pedidos": "Pedidos", "tempo_medio": "Maior tempo de entrega", "frete_medio": "Maior frete médio"}
+col1, col2 = st.columns([3, 1])
+ordem_ranking = col1.radio("Ordenar por:", options=list(ordens_ranking), format_func=ordens_ranking.get, horizontal=True)
+n_cidades = col2.number_input("Cidades:", min_value=5, max_value=100, value=10, step=5)
+with etapa("agregação: principais cidades", pedidos_log):
+    ranking = tabela_ranking_cidades(versao_dados(), start_date, end_date, estados_selecionados, tuple(cidades_selecionadas), ordem_ranking, int(n_cidades))
+st.dataframe(
+    ranking,
+    column_config={
+        "customer_state": "Estado", "customer_city": "Cidade", "pedidos": "Pedidos",
+        "tempo_medio": st.column_config.NumberColumn("Tempo Médio (dias)", format="%.1f"),
+        "frete_medio": st.column_config.NumberColumn("Frete Médio por Pedido", format="R$ %.2f"),
+        "faturamento": st.column_config.NumberColumn("Faturamento", format="R$ %.2f"),
+    },
+    hide_index=True,
+)
+
+st.markdown("### Atrasos frente ao Prazo Estimado")
+with etapa("agregação: atrasos", df_log):
+    total_atrasos = atrasos_regionais(versao_dados(), start_date, end_date, estados_selecionados, tuple(cidades_selecionadas), None).iloc[0]
+if total_atrasos["pedidos"] > 0:
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Entregas no Prazo", f"{total_atrasos['taxa_no_prazo']:.1%}")
+    col2.metric("Pedidos Atrasados", f"{int(total_atrasos['atrasados']):,}")
+    col3.metric("Dias vs. Prazo (p50 / p90 / p99)", f"{total_atrasos['atraso_p50']:+.0f} / {total_atrasos['atraso_p90']:+.0f} / {total_atrasos['atraso_p99']:+.0f}")
+    dimensao_atraso = st.selectbox("Atrasos por:", options=list(DIMENSOES_ATRASO), format_func=DIMENSOES_ATRASO.get)
+    with etapa(f"agregação: atrasos por {dimensao_atraso}", df_log):
+        tabela_atrasos = atrasos_regionais(versao_dados(), start_date, end_date, estados_selecionados, tuple(cidades_selecionadas), dimensao_atraso)
+    with etapa("figura: atrasos"):
+        fig_atrasos = figura_atrasos(tabela_atrasos, dimensao_atraso)
+    grafico("atrasos", fig_atrasos, use_container_width=True)
+    st.dataframe(
+        tabela_atrasos.rename_axis(DIMENSOES_ATRASO[dimensao_atraso]),
+        column_config={
+            "pedidos": "Pedidos", "atrasados": "Atrasados",
+            "taxa_no_prazo": st.column_config.NumberColumn("No prazo", format="percent"),
+            "atraso_p50": "p50 (dias)", "atraso_p90": "p90 (dias)", "atraso_p99": "p99 (dias)",
+        },
+    )
+else:
+    st.info("Nenhuma entrega com prazo estimado no período.")
@@ -0,0 +1,51 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dados_loja import carregar_base, derivado_do_snapshot, reais
+
+# --- FATO DE PEDIDOS ---
+# Uma linha por pedido, montada das colunas que dados_loja.adicionar_colunas_pedido grava na
+# carga (código inteiro do pedido, peso de cada item e faturamento já deduplicado). Contagens
+# usam os códigos inteiros (factorize + bincount) em vez de nunique sobre o texto do order_id.
+
+COLUNAS_PEDIDO = ["pedido", "order_id", "order_purchase_timestamp", "customer_state", "customer_city", "regiao", "tempo_entrega", "review_score"]
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def linhas_por_pedido(codigos):
+    # quantas linhas do próprio recorte cada linha tem no seu pedido
+    locais, _ = pd.factorize(np.asarray(codigos))
+    return np.bincount(locais)[locais]
+
+
+def um_por_pedido(df):
+    # a primeira linha de cada pedido: tempo de entrega, nota e estado são do pedido e se repetem nas linhas dele
+    return df[~df["pedido"].duplicated().to_numpy()]
+
+
+def construir_pedidos(df):
+    primeiras = ~df["pedido"].duplicated().to_numpy()
+    locais, _ = pd.factorize(df["pedido"])
+    pedidos = df.loc[primeiras, COLUNAS_PEDIDO].reset_index(drop=True)
+    pedidos["itens"] = np.bincount(locais, weights=df["peso_item"])
+    pedidos["faturamento"] = np.bincount(locais, weights=df["faturamento_rateado"])
+    pedidos["frete"] = np.bincount(locais, weights=np.nan_to_num(reais(df["freight_value"])) * df["peso_item"].to_numpy(dtype=np.float64))
+    return pedidos
+
+
+def carregar_pedidos():
+    # uma linha por pedido, ordenada por compra; refeita apenas quando a base é recarregada
+    base = carregar_base()
+    with _lock:
+        em_cache = _cache.get("base")
+        if em_cache is not None and em_cache[0] is base:
+            return em_cache[1]
+        pedidos = derivado_do_snapshot("pedidos", base)
+        if pedidos is None:
+            pedidos = construir_pedidos(base)
+        _cache["base"] = (base, pedidos)
+        return pedidos
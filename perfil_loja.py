@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+# --- PERFIL DE CADA EXECUÇÃO DAS PÁGINAS ---
+# Ligado só com ?debug=1 na URL. Cada página chama iniciar_perfil() no topo e envolve as etapas que
+# interessam (carga, filtro, agregações, montagem de figuras) em `with etapa(...)`; os gráficos
+# passam por grafico(), que mede o st.plotly_chart e o tamanho da figura enviada ao navegador.
+# As medidas aparecem num painel recolhível na barra lateral e são anexadas, uma linha JSON por
+# etapa, ao arquivo de log (PERFIL_LOJA_ARQUIVO, padrão perfil_loja.jsonl), para análise depois.
+# Desligado, etapa() só executa o bloco.
+
+ARQUIVO_PADRAO = "perfil_loja.jsonl"
+
+_estado = threading.local()  # o Streamlit roda cada execução de uma sessão numa thread
+_lock_arquivo = threading.Lock()
+
+
+def caminho_log():
+    return os.environ.get("PERFIL_LOJA_ARQUIVO", ARQUIVO_PADRAO)
+
+
+def ativo():
+    return getattr(_estado, "execucao", None) is not None
+
+
+def _so_fragmento():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    contexto = get_script_run_ctx()
+    return contexto is not None and bool(contexto.fragment_ids_this_run)
+
+
+def iniciar_perfil(pagina, fragmento=False):
+    # fragmento=True no topo de uma função @st.fragment: quando a página inteira roda, as etapas do
+    # fragmento entram no perfil dela; quando só o fragmento roda, ele abre um perfil próprio, com o
+    # painel dentro do fragmento (um fragmento não pode escrever na barra lateral)
+    import streamlit as st
+
+    if fragmento and not _so_fragmento():
+        return
+    _estado.execucao = None
+    if st.query_params.get("debug", "") in ("", "0", "false"):
+        return
+    _estado.execucao = uuid.uuid4().hex[:12]
+    _estado.pagina = pagina
+    _estado.inicio = time.perf_counter()
+    _estado.registros = []
+    _estado.painel = st.empty() if fragmento else st.sidebar.empty()
+
+
+def _registrar(nome, segundos, linhas=None, tamanho=None):
+    registro = {
+        "momento": datetime.now().isoformat(timespec="milliseconds"),
+        "execucao": _estado.execucao,
+        "pagina": _estado.pagina,
+        "etapa": nome,
+        "segundos": round(segundos, 6),
+        "linhas": linhas,
+        "bytes": tamanho,
+    }
+    _estado.registros.append(registro)
+    with _lock_arquivo, open(caminho_log(), "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro) + "\n")
+    _desenhar()
+
+
+def _desenhar():
+    # o painel é redesenhado a cada etapa: a página pode parar no meio (st.stop) e ele já está lá
+    import streamlit as st
+
+    tabela = pd.DataFrame(_estado.registros)[["etapa", "segundos", "linhas", "bytes"]]
+    decorrido = time.perf_counter() - _estado.inicio
+    with _estado.painel.container():
+        with st.expander(f"⏱️ Perfil: {decorrido:.3f} s até aqui", expanded=False):
+            st.dataframe(tabela, hide_index=True, use_container_width=True)
+            st.caption(f"Execução {_estado.execucao}; gravado em {caminho_log()}")
+
+
+@contextmanager
+def etapa(nome, entrada=None):
+    # `entrada`: DataFrame/Series processado na etapa, para registrar quantas linhas passaram por ela
+    if not ativo():
+        yield
+        return
+    inicio = time.perf_counter()
+    yield
+    _registrar(nome, time.perf_counter() - inicio, linhas=len(entrada) if entrada is not None else None)
+
+
+def _pontos(trace):
+    for atributo in ("x", "values", "locations"):
+        valores = getattr(trace, atributo, None)
+        if valores is not None:
+            return len(valores)
+    return 0
+
+
+def grafico(nome, figura, **opcoes):
+    # st.plotly_chart medido; o tamanho é o JSON da figura, o que de fato vai para o navegador
+    import streamlit as st
+
+    if not ativo():
+        return st.plotly_chart(figura, **opcoes)
+    inicio = time.perf_counter()
+    resultado = st.plotly_chart(figura, **opcoes)
+    segundos = time.perf_counter() - inicio
+    pontos = sum(_pontos(trace) for trace in figura.data)
+    _registrar(f"grafico: {nome}", segundos, linhas=pontos, tamanho=len(figura.to_json()))
+    return resultado
+
+
+def resumir(caminho=None, pagina=None):
+    # por (página, etapa): quantas execuções, mediana, p90 e máximo do tempo, linhas e bytes médios
+    registros = pd.read_json(caminho or caminho_log(), lines=True)
+    if pagina:
+        registros = registros[registros["pagina"] == pagina]
+    resumo = registros.groupby(["pagina", "etapa"], sort=False).agg(
+        execucoes=("segundos", "size"),
+        mediana_s=("segundos", "median"),
+        p90_s=("segundos", lambda s: s.quantile(0.9)),
+        max_s=("segundos", "max"),
+        linhas=("linhas", "mean"),
+        bytes=("bytes", "mean"),
+    )
+    return resumo.sort_values("mediana_s", ascending=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resume o log de perfil das páginas (gravado com ?debug=1).")
+    parser.add_argument("arquivo", nargs="?", default=None, help=f"log JSON (padrão: $PERFIL_LOJA_ARQUIVO ou {ARQUIVO_PADRAO})")
+    parser.add_argument("--pagina", help="só as etapas desta página")
+    args = parser.parse_args()
+    print(resumir(args.arquivo, args.pagina).to_string(float_format="{:,.4f}".format))
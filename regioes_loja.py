@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+# --- REGIÕES ---
+# Agrupamentos de estados usados na logística e no bot. A coluna `regiao` (as cinco regiões do
+# IBGE) é calculada na carga; agrupamentos personalizados saem da mesma tradução estado -> grupo,
+# feita uma vez por categoria de estado e aplicada aos códigos, sem comparar texto linha a linha.
+
+REGIOES = {
+    "Norte": ["AM", "RR", "AP", "PA", "TO", "RO", "AC"],
+    "Nordeste": ["MA", "PI", "CE", "RN", "PB", "PE", "AL", "SE", "BA"],
+    "Centro-Oeste": ["MT", "MS", "GO", "DF"],
+    "Sudeste": ["SP", "RJ", "MG", "ES"],
+    "Sul": ["PR", "SC", "RS"],
+}
+
+
+def regiao_dos_estados(estados, grupos=REGIOES):
+    # Series categórica com o grupo de cada linha (NaN para estados fora dos grupos); se um estado
+    # aparece em mais de um grupo, vale o primeiro
+    estados = estados.astype("category") if not isinstance(estados.dtype, pd.CategoricalDtype) else estados
+    grupo_do_estado = {}
+    for posicao, membros in enumerate(grupos.values()):
+        for estado in membros:
+            grupo_do_estado.setdefault(estado, posicao)
+    traducao = np.array([grupo_do_estado.get(e, -1) for e in estados.cat.categories] + [-1], dtype=np.int8)
+    codigos = traducao[estados.cat.codes.to_numpy()]  # código -1 (estado vazio) cai no último item
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=list(grupos)), index=estados.index, name="regiao")
+
+
+def estados_das_regioes(regioes, grupos=REGIOES):
+    return [estado for regiao in regioes for estado in grupos[regiao]]
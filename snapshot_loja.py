@@ -0,0 +1,47 @@
+import argparse
+import os
+import time
+
+from cubo_loja import carregar_cubo
+from dados_loja import CAMINHO_SNAPSHOT, carregar_base, escrever_snapshot, escrever_snapshot_vendedores, ler_snapshot, marca_da_base
+from pedidos_loja import carregar_pedidos
+
+# --- SNAPSHOT PARA A PARTIDA A FRIO ---
+# Rodado no deploy e depois de cada atualização do CSV: grava em CAMINHO_SNAPSHOT as tabelas que
+# um processo novo precisaria montar (base, pedidos, cubo e linhas preparadas de cada loja). Os
+# processos abrem esses arquivos mapeados na memória (dados_loja.ler_snapshot) em vez de ler o
+# Parquet e refazer pedidos, cubo, fuso horário e colunas derivadas.
+
+TABELAS = ["base", "pedidos", "cubo", "vendedores"]
+
+
+def gerar_snapshot(pasta=CAMINHO_SNAPSHOT):
+    base = carregar_base()
+    marca = marca_da_base(base)
+    escrever_snapshot("pedidos", carregar_pedidos(), marca, pasta)
+    escrever_snapshot("cubo", carregar_cubo(), marca, pasta)
+    escrever_snapshot_vendedores(base, marca, pasta)
+    escrever_snapshot("base", base, marca, pasta)
+    return marca
+
+
+def conferir_snapshot(pasta=CAMINHO_SNAPSHOT):
+    # por tabela: linhas, tamanho do arquivo e quanto leva para abrir e virar DataFrame
+    linhas = []
+    for nome in TABELAS:
+        inicio = time.perf_counter()
+        _, tabela = ler_snapshot(nome, pasta)
+        tabela.to_pandas(split_blocks=True)
+        tamanho = os.path.getsize(os.path.join(pasta, f"{nome}.arrow"))
+        linhas.append((nome, tabela.num_rows, tamanho / 2**20, time.perf_counter() - inicio))
+    return linhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera o snapshot Arrow lido pelas páginas na partida a frio.")
+    parser.parse_args()
+    inicio = time.perf_counter()
+    gerar_snapshot()
+    print(f"{CAMINHO_SNAPSHOT}: gerado em {time.perf_counter() - inicio:.1f} s")
+    for nome, linhas, megabytes, segundos in conferir_snapshot():
+        print(f"  {nome:<10} {linhas:>12,} linhas {megabytes:>9,.1f} MB  abre em {segundos * 1000:,.1f} ms")
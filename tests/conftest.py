@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot_loja
+import cidades_loja
+import cubo_loja
+import dados_loja
+import pedidos_loja
+from dados_sinteticos import gerar_csv
+
+LINHAS = 3_000
+
+
+def limpar_caches():
+    # os módulos guardam uma cópia por processo; cada teste começa frio
+    for cache in (dados_loja._cache, dados_loja._cache_indice, dados_loja._incrementos, cubo_loja._cache, pedidos_loja._cache, cidades_loja._cache):
+        cache.clear()
+    for funcao in (bot_loja._responder_em_cache, bot_loja._padroes_dos_dados, bot_loja._cubo_das_lojas):
+        funcao.cache_clear()
+
+
+@pytest.fixture
+def pasta(tmp_path, monkeypatch):
+    # os módulos leem dataset_olist_final_limpo.csv do diretório atual
+    monkeypatch.chdir(tmp_path)
+    limpar_caches()
+    yield tmp_path
+    limpar_caches()
+
+
+@pytest.fixture
+def csv_completo(pasta):
+    caminho = pasta / "completo.csv"
+    gerar_csv(str(caminho), LINHAS, semente=1, vendedores=20)
+    return caminho
+
+
+
+@pytest.fixture
+def base_sintetica(pasta):
+    gerar_csv(dados_loja.CAMINHO_CSV, LINHAS, semente=1, vendedores=20)
+    return dados_loja.carregar_base()
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import dados_loja
+from conftest import limpar_caches
+
+
+def _linhas(caminho):
+    with open(caminho, "rb") as f:
+        return f.read().splitlines(keepends=True)
+
+
+def _corte(linhas, perto, meio_do_pedido=False):
+    # índice da primeira linha de um pedido (ou de uma linha no meio de um), a partir de `perto`
+    pedidos = [linha.split(b",", 1)[0] for linha in linhas]
+    n = perto
+    while (pedidos[n] == pedidos[n - 1]) != meio_do_pedido:
+        n += 1
+    return n
+
+
+def _escrever(linhas, modo="wb"):
+    with open(dados_loja.CAMINHO_CSV, modo) as f:
+        f.writelines(linhas)
+
+
+def _comparar(obtido, esperado):
+    # `pedido` é só um código interno: nos anexos ele continua a numeração em vez de seguir a data
+    obtido, esperado = obtido.drop(columns="pedido"), esperado.drop(columns="pedido")
+    pd.testing.assert_frame_equal(obtido.reset_index(drop=True), esperado.reset_index(drop=True), check_categorical=False)
+
+
+def test_anexos_iguais_a_reler_o_csv(csv_completo):
+    linhas = _linhas(csv_completo)
+    c1, c2 = _corte(linhas, len(linhas) // 2), _corte(linhas, len(linhas) * 3 // 4)
+    esperado = dados_loja.ler_csv(str(csv_completo))
+
+    _escrever(linhas[:c1])
+    dados_loja.carregar_base()
+    _escrever(linhas[c1:c2], "ab")
+    dados_loja.carregar_base()
+    _escrever(linhas[c2:], "ab")
+    _comparar(dados_loja.carregar_base(), esperado)
+    # o trecho anexado vai para um arquivo à parte; o Parquet principal não é regravado
+    assert len(os.listdir(dados_loja._pasta_anexos(dados_loja.CAMINHO_PARQUET))) == 2
+
+    # outro processo: Parquet principal + anexos
+    limpar_caches()
+    _comparar(dados_loja.carregar_base(), esperado)
+
+    dados_loja.compactar_parquet()
+    assert os.listdir(dados_loja._pasta_anexos(dados_loja.CAMINHO_PARQUET)) == []
+    limpar_caches()
+    _comparar(dados_loja.carregar_base(), esperado)
+
+
+def test_anexo_no_meio_de_um_pedido(csv_completo):
+    linhas = _linhas(csv_completo)
+    corte = _corte(linhas, len(linhas) // 2, meio_do_pedido=True)
+    _escrever(linhas[:corte])
+    dados_loja.carregar_base()
+    _escrever(linhas[corte:], "ab")
+    esperado = dados_loja.ler_csv(str(csv_completo))
+    _comparar(dados_loja.carregar_base(), esperado)
+    limpar_caches()
+    _comparar(dados_loja.carregar_base(), esperado)
+
+
+def test_vendedores_com_anexos(csv_completo):
+    linhas = _linhas(csv_completo)
+    corte = _corte(linhas, len(linhas) * 2 // 3)
+    _escrever(linhas[:corte])
+    dados_loja.carregar_base()
+    _escrever(linhas[corte:], "ab")
+    dados_loja.carregar_base()
+    limpar_caches()
+
+    esperado = dados_loja.ler_csv(str(csv_completo))
+    vendedores = dados_loja.listar_vendedores()
+    assert vendedores == sorted(esperado["seller_id"].dropna().unique())
+    for seller_id in vendedores:
+        _comparar(dados_loja.carregar_vendedor(seller_id), esperado[esperado["seller_id"] == seller_id])
+
+
+def test_rateio_soma_cada_pagamento(csv_completo):
+    df = dados_loja.ler_csv(str(csv_completo))
+    pagamentos = pd.DataFrame({
+        "order_id": df["order_id"].astype(str),
+        "payment_type": df["payment_type"].astype(str),
+        "centavos": np.round(dados_loja.reais(df["payment_value"]) * 100).astype(np.int64),
+        "parte": np.round(df["faturamento_rateado"] * 100).astype(np.int64),
+    })
+    somas = pagamentos.groupby(["order_id", "payment_type", "centavos"])["parte"].sum()
+    assert (somas == somas.index.get_level_values("centavos")).all()
+
+
+def test_rateio_sem_preco_e_com_sobra():
+    grupo = np.array([0, 0, 0, 1, 1, 2])
+    valor = np.array([10.00, 10.00, 10.00, 0.05, 0.05, 7.77])
+    preco = np.array([1.0, 1.0, 1.0, 0.0, 0.0, 3.0])
+    partes = np.round(dados_loja._ratear_centavos(grupo, valor, preco) * 100).astype(np.int64)
+    assert np.bincount(grupo, weights=partes).tolist() == [1000, 5, 777]
+    # ninguém recebe mais de um centavo a mais que a sua parte exata
+    assert sorted(partes[:3].tolist()) == [333, 333, 334]
+    assert sorted(partes[3:5].tolist()) == [2, 3]
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+import bot_loja
+import dados_loja
+from cubo_loja import carregar_cubo, carregar_cubo_lojas
+from lote_bot import conferir_com_chat, montar_itens
+from pedidos_loja import carregar_pedidos
+
+PERGUNTAS = [
+    "Me dê um resumo do período", "Qual meu produto mais vendido?", "Meus clientes estão satisfeitos?",
+    "Qual o ticket médio?", "Qual dia da semana vende mais?", "Qual estado tem a entrega mais demorada?",
+    "Qual o tempo médio de entrega?", "Quantos pedidos atrasaram?", "Qual o faturamento em SP?",
+    "Quantos pedidos no cartão de crédito?", "Qual o frete no Nordeste?",
+]
+
+
+def _perguntas_com_filtros(base):
+    # cidade e categoria que existem na base sintética
+    cidade = base["customer_city"].value_counts().index[0]
+    categoria = base["product_category_name_english"].value_counts().index[0]
+    return PERGUNTAS + [f"frete na cidade de {cidade}", f"faturamento de {categoria}", f"pedidos de {categoria} no boleto"]
+
+
+def test_lote_igual_ao_chat(base_sintetica):
+    perguntas = pd.DataFrame({"pergunta": _perguntas_com_filtros(base_sintetica)})
+    inicio, fim = base_sintetica["order_purchase_timestamp"].min().date(), base_sintetica["order_purchase_timestamp"].max().date()
+    # as perguntas com filtro precisam ter sido entendidas como tal para o teste valer alguma coisa
+    consultas = [bot_loja.interpretar(p, inicio, fim)[0] for p in perguntas["pergunta"][-3:]]
+    assert consultas[0].cidades and consultas[1].categorias and consultas[2].categorias and consultas[2].pagamentos
+
+    itens = montar_itens(perguntas, por_mes=True)
+    assert conferir_com_chat(itens).empty
+    lojas = sorted(base_sintetica["seller_id"].unique())[:3]
+    itens_lojas = [(pergunta, None, seller_id) for pergunta, _, _ in itens[::len(itens) // len(perguntas)] for seller_id in lojas]
+    assert conferir_com_chat(itens_lojas).empty
+
+
+def _pagamentos_distintos(linhas):
+    # um pagamento distinto = (pedido, tipo, valor); entra uma vez, qualquer que seja o número de itens
+    pagamentos = linhas[["order_id", "payment_type", "payment_value"]].drop_duplicates()
+    return np.round(dados_loja.reais(pagamentos["payment_value"]).sum(), 2)
+
+
+def test_faturamento_sem_pagamento_repetido(base_sintetica):
+    esperado = _pagamentos_distintos(base_sintetica)
+    assert np.round(base_sintetica["faturamento_rateado"].sum(), 2) == esperado
+    assert np.round(carregar_cubo()["faturamento"].sum(), 2) == esperado
+    assert np.round(carregar_pedidos()["faturamento"].sum(), 2) == esperado
+    # o portal do vendedor só tem pedidos entregues
+    entregues = dados_loja.carregar_linhas_lojas()
+    assert np.round(carregar_cubo_lojas()["faturamento"].sum(), 2) == _pagamentos_distintos(entregues)